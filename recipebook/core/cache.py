@@ -0,0 +1,90 @@
+from functools import partial
+from threading import local
+from typing import Any
+
+from django.apps import apps
+from django.core.signals import request_finished, request_started
+from django.db import models, transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+_scheduled = local()
+_request = local()
+
+
+def get_generation_model() -> type[models.Model]:
+    return apps.get_model("core", "Generation")
+
+
+def get_generation(key: str) -> int:
+    generations = getattr(_request, "generations", None)
+    if generations is not None and key in generations:
+        return generations[key]
+
+    model = get_generation_model()
+    values = model.objects.filter(pk=key).values_list(
+        model.value.field.name,
+        flat=True,
+    )
+    value = values.first() or 0
+    if generations is not None:
+        generations[key] = value
+
+    return value
+
+
+def bump_generation(key: str) -> int:
+    model = get_generation_model()
+    value_name = model.value.field.name
+    with transaction.atomic():
+        model.objects.get_or_create(pk=key)
+        model.objects.filter(pk=key).update(
+            **{value_name: F(value_name) + 1},
+        )
+        value = (
+            model.objects.filter(pk=key)
+            .values_list(value_name, flat=True)
+            .get()
+        )
+
+    generations = getattr(_request, "generations", None)
+    if generations is not None:
+        generations[key] = value
+
+    return value
+
+
+@receiver(request_started)
+def remember_generations(**kwargs: Any) -> None:
+    _request.generations = {}
+
+
+@receiver(request_finished)
+def forget_generations(**kwargs: Any) -> None:
+    _request.generations = None
+
+
+def schedule_bump(key: str) -> None:
+    scheduled = _get_scheduled()
+    token = object()
+    scheduled[key] = token
+    transaction.on_commit(partial(_bump_scheduled, key, token))
+
+
+def _get_scheduled() -> dict[str, object]:
+    if not hasattr(_scheduled, "tokens"):
+        _scheduled.tokens = {}
+
+    return _scheduled.tokens
+
+
+def _bump_scheduled(key: str, token: object) -> None:
+    scheduled = _get_scheduled()
+    if scheduled.get(key) is not token:
+        return
+
+    del scheduled[key]
+    bump_generation(key)
+
+
+__all__ = []
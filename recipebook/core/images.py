@@ -0,0 +1,65 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core import exceptions
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import ImageFieldFile
+from django.utils.translation import gettext as _
+from PIL import Image, ImageOps
+
+
+def validate_image_upload(image: ImageFieldFile) -> None:
+    if getattr(image, "_committed", True):
+        return
+
+    try:
+        image.seek(0)
+        with Image.open(image) as source:
+            width, height = source.size
+    except Image.DecompressionBombError:
+        raise exceptions.ValidationError(_("error__image_too_large"))
+    except OSError:
+        raise exceptions.ValidationError(_("error__invalid_image"))
+    finally:
+        image.seek(0)
+
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise exceptions.ValidationError(_("error__image_too_large"))
+
+
+def process_image_upload(image: ImageFieldFile) -> None:
+    image.seek(0)
+    try:
+        output = resize_image(image, settings.IMAGE_UPLOAD_MAX_SIZE)
+    except (Image.DecompressionBombError, OSError):
+        output = None
+    finally:
+        image.seek(0)
+
+    if output is not None:
+        image.file = ContentFile(output, name=image.name)
+
+
+def resize_image(image: ImageFieldFile, max_size: int) -> bytes | None:
+    with Image.open(image) as source:
+        if getattr(source, "is_animated", False):
+            return None
+
+        image_format = source.format
+        icc_profile = source.info.get("icc_profile")
+        source.draft(source.mode, (max_size, max_size))
+
+        processed = ImageOps.exif_transpose(source)
+        processed.thumbnail((max_size, max_size))
+        output = BytesIO()
+        processed.save(
+            output,
+            format=image_format,
+            quality=90,
+            icc_profile=icc_profile,
+        )
+
+    return output.getvalue()
+
+
+__all__ = []
@@ -0,0 +1,121 @@
+from typing import Any
+
+from django.db import connection, models
+from django.db.migrations.operations.base import Operation
+from django.db.models.expressions import RawSQL
+
+MIN_TRIGRAM_QUERY = 3
+
+
+def get_name_index_table(model: type[models.Model]) -> str:
+    return f"{model._meta.db_table}_name_index"
+
+
+class NameIndex:
+    def is_available(self) -> bool:
+        return connection.vendor == "sqlite"
+
+    def can_search(self, query: str) -> bool:
+        return self.is_available() and len(query) >= MIN_TRIGRAM_QUERY
+
+    def get_search_sql(
+        self,
+        model: type[models.Model],
+        query: str,
+    ) -> tuple[str, list[str]]:
+        table = connection.ops.quote_name(get_name_index_table(model))
+        return (
+            f"SELECT rowid FROM {table} WHERE normalized_name LIKE %s",
+            [f"%{query}%"],
+        )
+
+    def get_subquery(self, model: type[models.Model], query: str) -> RawSQL:
+        return RawSQL(*self.get_search_sql(model, query))
+
+    def search(self, model: type[models.Model], query: str) -> set[int]:
+        with connection.cursor() as cursor:
+            cursor.execute(*self.get_search_sql(model, query))
+            return {row[0] for row in cursor.fetchall()}
+
+    def update(self, instance: Any) -> None:
+        if not self.is_available() or instance.pk is None:
+            return
+
+        table = connection.ops.quote_name(get_name_index_table(type(instance)))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {table} (rowid, normalized_name) "
+                "VALUES (%s, %s)",
+                [instance.pk, instance.normalized_name],
+            )
+
+    def delete(self, instance: Any) -> None:
+        if not self.is_available() or instance.pk is None:
+            return
+
+        table = connection.ops.quote_name(get_name_index_table(type(instance)))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE rowid = %s",
+                [instance.pk],
+            )
+
+
+class CreateNameIndex(Operation):
+    reversible = True
+    reduces_to_sql = True
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+
+    def deconstruct(self) -> tuple[str, list, dict]:
+        return self.__class__.__qualname__, [self.model_name], {}
+
+    def state_forwards(self, app_label: str, state: Any) -> None:
+        pass
+
+    def database_forwards(
+        self,
+        app_label: str,
+        schema_editor: Any,
+        from_state: Any,
+        to_state: Any,
+    ) -> None:
+        if schema_editor.connection.vendor != "sqlite":
+            return
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        quote = schema_editor.quote_name
+        table = quote(get_name_index_table(model))
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} "
+            "USING fts5(normalized_name, tokenize='trigram')",
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, normalized_name) "
+            f"SELECT {quote(model._meta.pk.column)}, "
+            f"{quote('normalized_name')} FROM {quote(model._meta.db_table)}",
+        )
+
+    def database_backwards(
+        self,
+        app_label: str,
+        schema_editor: Any,
+        from_state: Any,
+        to_state: Any,
+    ) -> None:
+        if schema_editor.connection.vendor != "sqlite":
+            return
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        table = schema_editor.quote_name(get_name_index_table(model))
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def describe(self) -> str:
+        return f"Create trigram name index for {self.model_name}"
+
+
+name_index = NameIndex()
+
+
+__all__ = []
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+LAZY_MODULES = ("markdown", "pymdownx")
+
+
+def measure_imports(*command: str) -> list[tuple[str, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "manage.py", *command],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            timings.append((name.strip(), depth, int(cumulative)))
+
+    return timings
+
+
+def get_lazy_imports(timings: list[tuple[str, int, int]]) -> list[str]:
+    return [
+        name for name, _, _ in timings if name.split(".")[0] in LAZY_MODULES
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure startup import time and check lazy modules"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--command", default="check")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        timings = measure_imports(options["command"])
+        top_level = [
+            (name, cumulative)
+            for name, depth, cumulative in timings
+            if depth == 0
+        ]
+        total = sum(cumulative for _, cumulative in top_level)
+        self.stdout.write(
+            f"{len(timings)} modules, {total / 1000:.1f} ms total",
+        )
+        slowest = sorted(top_level, key=lambda item: -item[1])
+        for name, cumulative in slowest[: options["top"]]:
+            self.stdout.write(f"{cumulative / 1000:8.1f} ms  {name}")
+
+        lazy = get_lazy_imports(timings)
+        if lazy:
+            raise CommandError(
+                f"Imported at startup: {', '.join(sorted(lazy))}",
+            )
+
+        self.stdout.write(self.style.SUCCESS("Lazy modules not imported"))
+
+
+__all__ = []
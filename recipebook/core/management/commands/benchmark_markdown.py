@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.utils import render_markdown
+
+SAMPLE_TEXT = "\n".join(
+    [
+        "# Шаг {index}",
+        "",
+        "Смешайте **муку** и ~~сахар~~, см. https://example.com :smile:",
+        "",
+        "| Ингредиент | Количество |",
+        "| --- | --- |",
+        "| Мука | {index}00 г |",
+        "",
+        "- [x] Разогреть духовку",
+        "- [ ] Выпекать {index} минут",
+        "",
+        "```python",
+        "print({index})",
+        "```",
+    ],
+)
+
+
+class Command(BaseCommand):
+    help = "Measure markdown rendering throughput"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--renders", type=int, default=2000)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4, 8],
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        texts = [
+            SAMPLE_TEXT.format(index=i) for i in range(options["renders"])
+        ]
+        render_markdown(texts[0])
+        for threads in options["threads"]:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                rendered = sum(map(len, executor.map(render_markdown, texts)))
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{threads} threads: {len(texts) / elapsed:.0f} renders/s, "
+                f"{rendered} bytes of html",
+            )
+
+
+__all__ = []
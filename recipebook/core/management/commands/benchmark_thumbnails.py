@@ -0,0 +1,122 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandParser
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.models import ThumbnailsMixin
+from core.thumbnails import get_thumbnail_options, split_thumbnail_spec
+
+
+def render_thumbnail(
+    source: ImageFile,
+    geometry: str,
+    options: dict[str, Any],
+) -> bytes:
+    engine = default.engine
+    options = get_thumbnail_options(source, options)
+    image = engine.get_image(source)
+    options["image_info"] = engine.get_image_info(image)
+    ratio = engine.get_image_ratio(image, options)
+    thumbnail = engine.create(image, parse_geometry(geometry, ratio), options)
+    return engine._get_raw_data(
+        thumbnail,
+        options["format"],
+        toint(options["quality"]),
+        image_info=options["image_info"],
+        progressive=options.get(
+            "progressive",
+            sorl_settings.THUMBNAIL_PROGRESSIVE,
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = "Compare thumbnail variant sizes on fixture images"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--media-root",
+            type=Path,
+            default=settings.BASE_DIR / "fixtures" / "media",
+        )
+        parser.add_argument(
+            "--formats",
+            nargs="+",
+            default=None,
+            help="Encode variants in these formats instead, e.g. WEBP JPEG",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        storage = FileSystemStorage(location=options["media_root"])
+        for model in apps.get_models():
+            if not issubclass(model, ThumbnailsMixin):
+                continue
+
+            for field_name in model.thumbnails:
+                field = model._meta.get_field(field_name)
+                directory = str(field.upload_to.path)
+                if not storage.exists(directory):
+                    continue
+
+                _, files = storage.listdir(directory)
+                sources = [
+                    ImageFile(f"{directory}/{name}", storage)
+                    for name in sorted(files)
+                ]
+                for name in model.thumbnails[field_name]:
+                    variants = model.get_thumbnail_variants(field_name, name)
+                    if sources and variants:
+                        self.compare(
+                            f"{model._meta.label}.{field_name} {name}",
+                            sources,
+                            model.thumbnails[field_name],
+                            [name, *variants],
+                            options["formats"],
+                        )
+
+    def compare(
+        self,
+        label: str,
+        sources: list[ImageFile],
+        specs: dict[str, dict[str, Any]],
+        names: list[str],
+        formats: list[str] | None,
+    ) -> None:
+        baseline, *variants = names
+        geometry, options = split_thumbnail_spec(baseline, specs[baseline])
+        baseline_size = sum(
+            len(render_thumbnail(source, geometry, options))
+            for source in sources
+        )
+        self.stdout.write(
+            f"{label}: {len(sources)} images, "
+            f"{options.get('format', 'JPEG')} {baseline_size} bytes",
+        )
+        sizes = defaultdict(int)
+        for variant in variants:
+            geometry, options = split_thumbnail_spec(variant, specs[variant])
+            for image_format in formats or [options["format"]]:
+                options["format"] = image_format.upper()
+                for source in sources:
+                    thumbnail = render_thumbnail(source, geometry, options)
+                    sizes[image_format.upper(), variant] += len(thumbnail)
+
+        for (image_format, variant), size in sizes.items():
+            saved = baseline_size - size
+            self.stdout.write(
+                f"  {image_format} {specs[variant]['width']}w: "
+                f"{size} bytes, saved {saved} bytes "
+                f"({saved / baseline_size:.0%})",
+            )
+
+
+__all__ = []
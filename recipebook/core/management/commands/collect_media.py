@@ -0,0 +1,37 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandParser
+
+from core.storage import content_addressed_storage
+
+
+class Command(BaseCommand):
+    help = (  # noqa: A003
+        "Delete content addressed media files that no row references"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=24,
+            help="Keep files modified within this many hours",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not settings.MEDIA_CONTENT_ADDRESSED:
+            raise CommandError("MEDIA_CONTENT_ADDRESSED is disabled")
+
+        max_age = timedelta(hours=options["max_age"])
+        deleted = 0
+        for name in content_addressed_storage.collect_garbage(max_age):
+            deleted += 1
+            self.stdout.write(f"Deleted {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} files"))
+
+
+__all__ = []
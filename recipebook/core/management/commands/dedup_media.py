@@ -0,0 +1,134 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandParser
+from django.db import models
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.models import ThumbnailsMixin
+from core.storage import content_addressed_storage, get_storage_fields
+from core.thumbnails import delete_path_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Move media files to content addressed names"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not settings.MEDIA_CONTENT_ADDRESSED:
+            raise CommandError("MEDIA_CONTENT_ADDRESSED is disabled")
+
+        self.dry_run = options["dry_run"]
+        self.storage = content_addressed_storage
+        self.moved = 0
+        self.merged = 0
+        self.freed = 0
+        self.seen: set[str] = set()
+        self.done: set[str] = set()
+        self.fields = get_storage_fields(self.storage)
+        for model, field in self.fields:
+            self.dedup_field(model, field, options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {self.moved} files, merged {self.merged} duplicates, "
+                f"freed {self.freed} bytes",
+            ),
+        )
+
+    def dedup_field(
+        self,
+        model: type[models.Model],
+        field: models.FileField,
+        batch_size: int,
+    ) -> None:
+        queryset = model._default_manager.exclude(
+            **{f"{field.name}__startswith": self.storage.content_prefix},
+        )
+        queryset = queryset.exclude(**{field.name: ""}).exclude(
+            **{f"{field.name}__isnull": True},
+        )
+        queryset = queryset.values_list("pk", field.name).order_by("pk")
+        label = f"{model._meta.label}.{field.name}"
+        last_pk = None
+        while True:
+            batch_queryset = queryset
+            if last_pk is not None:
+                batch_queryset = queryset.filter(pk__gt=last_pk)
+
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+
+            for _, name in batch:
+                self.dedup_file(name)
+
+            last_pk = batch[-1][0]
+            self.stdout.write(
+                f"{label}: last pk {last_pk}, moved {self.moved}, "
+                f"merged {self.merged}",
+            )
+
+    def dedup_file(self, name: str) -> None:
+        if name in self.done:
+            return
+
+        self.done.add(name)
+        if not self.storage.exists(name):
+            self.stderr.write(f"Missing file {name}")
+            return
+
+        size = self.storage.size(name)
+        with self.storage.open(name) as content:
+            content_name = self.storage.get_content_name(name, File(content))
+            duplicate = content_name in self.seen
+            if not duplicate:
+                duplicate = self.storage.exists(content_name)
+
+            self.seen.add(content_name)
+            if not self.dry_run:
+                self.storage.save_content(content_name, File(content))
+
+        if duplicate:
+            self.merged += 1
+            self.freed += size
+        else:
+            self.moved += 1
+
+        if self.dry_run:
+            return
+
+        for model, field in self.fields:
+            updated = model._default_manager.filter(
+                **{field.name: name},
+            ).update(**{field.name: content_name})
+            if updated:
+                self.delete_thumbnails(model, field, name)
+
+        self.storage.delete(name)
+
+    def delete_thumbnails(
+        self,
+        model: type[models.Model],
+        field: models.FileField,
+        name: str,
+    ) -> None:
+        if not issubclass(model, ThumbnailsMixin):
+            return
+
+        if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+            delete_path_thumbnails(model, field.name, name)
+        else:
+            delete_thumbnails(
+                ImageFile(name, field.storage),
+                delete_file=False,
+            )
+
+
+__all__ = []
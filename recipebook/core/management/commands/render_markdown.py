@@ -0,0 +1,75 @@
+from typing import Any
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Q
+
+from core.models import RenderedMarkdownMixin
+
+
+class Command(BaseCommand):
+    help = (  # noqa: A003
+        "Render stored markdown html for rows where it is missing"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render all rows, not only rows without html",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for model in apps.get_models():
+            if issubclass(model, RenderedMarkdownMixin):
+                self.render_model(model, options["batch_size"], options["all"])
+
+    def render_model(
+        self,
+        model: type[RenderedMarkdownMixin],
+        batch_size: int,
+        render_all: bool,
+    ) -> None:
+        queryset = model.objects.only(
+            *model.rendered_fields,
+            *model.rendered_fields.values(),
+        ).order_by("pk")
+        if not render_all:
+            missing = Q()
+            for target in model.rendered_fields.values():
+                missing |= Q(**{target: ""})
+
+            queryset = queryset.filter(missing)
+
+        label = model._meta.label
+        total = queryset.count()
+        done = 0
+        last_pk = None
+        while True:
+            batch_queryset = queryset
+            if last_pk is not None:
+                batch_queryset = queryset.filter(pk__gt=last_pk)
+
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+
+            changed = [
+                instance
+                for instance in batch
+                if instance.render_markdown_fields(force=True)
+            ]
+            model.objects.bulk_update(
+                changed,
+                list(model.rendered_fields.values()),
+                batch_size=batch_size,
+            )
+            done += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"{label}: {done}/{total}")
+
+        self.stdout.write(self.style.SUCCESS(f"{label}: rendered {done}"))
+
+
+__all__ = []
@@ -0,0 +1,179 @@
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+import time
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Q
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from core.models import ThumbnailsMixin
+from core.thumbnails import (
+    create_executor,
+    generate_thumbnails,
+    get_cached_thumbnails,
+    get_path_thumbnail,
+    get_thumbnail_file,
+    split_thumbnail_spec,
+)
+
+
+class Command(BaseCommand):
+    help = "Generate missing thumbnails for all images"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            help="Only warm the given model label, e.g. recipes.Recipe",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.started = time.monotonic()
+        self.generated = 0
+        self.failed = 0
+        self.submitted: dict[Future, tuple[str, Any]] = {}
+        with create_executor(options["workers"]) as executor:
+            for model in apps.get_models():
+                if not issubclass(model, ThumbnailsMixin):
+                    continue
+
+                if options["models"] and (
+                    model._meta.label not in options["models"]
+                ):
+                    continue
+
+                self.warm_model(model, executor, options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {self.generated} thumbnails "
+                f"({self.get_rate():.1f}/s)",
+            ),
+        )
+        if self.failed:
+            self.stderr.write(f"Failed to generate for {self.failed} images")
+
+    def warm_model(
+        self,
+        model: type[ThumbnailsMixin],
+        executor: Any,
+        batch_size: int,
+    ) -> None:
+        label = model._meta.label
+        has_image = Q()
+        for field_name in model.thumbnails:
+            has_image |= ~Q(**{field_name: ""}) & Q(
+                **{f"{field_name}__isnull": False},
+            )
+
+        queryset = (
+            model.objects.filter(has_image)
+            .only(*model.thumbnails)
+            .order_by("pk")
+        )
+        total = queryset.count()
+        checked = 0
+        last_pk = None
+        pending: set[Future] = set()
+        while True:
+            batch_queryset = queryset
+            if last_pk is not None:
+                batch_queryset = queryset.filter(pk__gt=last_pk)
+
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+
+            for instance, specs in self.get_missing(batch).items():
+                future = executor.submit(
+                    generate_thumbnails,
+                    label,
+                    instance.pk,
+                    specs,
+                )
+                self.submitted[future] = (label, instance.pk)
+                pending.add(future)
+
+            while len(pending) > batch_size:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self.collect(done)
+
+            checked += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(
+                f"{label}: {checked}/{total}, last pk {last_pk}, "
+                f"{self.generated} generated ({self.get_rate():.1f}/s)",
+            )
+
+        done, _ = wait(pending)
+        self.collect(done)
+
+    def get_missing(
+        self,
+        instances: list[ThumbnailsMixin],
+    ) -> dict[ThumbnailsMixin, list[tuple[str, str]]]:
+        if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+            return self.get_missing_files(instances)
+
+        keys = {}
+        for instance in instances:
+            for field_name, specs in instance.thumbnails.items():
+                image = getattr(instance, field_name)
+                if not image:
+                    continue
+
+                for name, spec in specs.items():
+                    geometry, options = split_thumbnail_spec(name, spec)
+                    thumbnail = get_thumbnail_file(image, geometry, options)
+                    keys[add_prefix(thumbnail.key)] = (
+                        instance,
+                        field_name,
+                        name,
+                    )
+
+        cached = get_cached_thumbnails(list(keys))
+        missing = {}
+        for key, (instance, field_name, name) in keys.items():
+            if key not in cached:
+                missing.setdefault(instance, []).append((field_name, name))
+
+        return missing
+
+    def get_missing_files(
+        self,
+        instances: list[ThumbnailsMixin],
+    ) -> dict[ThumbnailsMixin, list[tuple[str, str]]]:
+        missing = {}
+        for instance in instances:
+            for field_name, specs in instance.thumbnails.items():
+                if not getattr(instance, field_name):
+                    continue
+
+                for name in specs:
+                    thumbnail = get_path_thumbnail(instance, field_name, name)
+                    if not thumbnail.exists():
+                        missing.setdefault(instance, []).append(
+                            (field_name, name),
+                        )
+
+        return missing
+
+    def collect(self, futures: set[Future]) -> None:
+        for future in futures:
+            label, pk = self.submitted.pop(future)
+            try:
+                self.generated += future.result()
+            except Exception as error:
+                self.failed += 1
+                self.stderr.write(f"{label} pk {pk}: {error!r}")
+
+    def get_rate(self) -> float:
+        return self.generated / max(time.monotonic() - self.started, 1e-6)
+
+
+__all__ = []
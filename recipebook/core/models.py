@@ -1,11 +1,32 @@
+from functools import partial
 from typing import Any
 
+from django.conf import settings
 from django.core import exceptions
-from django.db import models
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
+from sorl.thumbnail import get_thumbnail
 
-from core.utils import normalize_name
+from core.images import process_image_upload
+from core.indexes import name_index
+from core.references import reference_cache, ReferenceData
+from core.thumbnails import (
+    create_path_thumbnail,
+    delete_path_thumbnails,
+    get_path_thumbnail,
+    split_thumbnail_spec,
+    thumbnail_worker,
+)
+from core.utils import normalize_name, render_markdown, Thumbnail
+
+
+class Generation(models.Model):
+    key = models.CharField(primary_key=True, max_length=255)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
 
 
 class NormalizedNameMixin(models.Model):
@@ -23,6 +44,7 @@ class NormalizedNameMixin(models.Model):
         normalized = normalize_name(self.name)
         self.normalized_name = normalized
         super().save(*args, **kwargs)
+        name_index.update(self)
 
 
 class UniqueNormalizedNameMixin(models.Model):
@@ -37,10 +59,15 @@ class UniqueNormalizedNameMixin(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def get_references(cls) -> ReferenceData:
+        return reference_cache.get(cls)
+
     def save(self, *args: Any, **kwargs: Any) -> None:
         normalized = normalize_name(self.name)
         self.normalized_name = normalized
         super().save(*args, **kwargs)
+        reference_cache.invalidate(self.__class__)
 
     def clean(self) -> None:
         super().clean()
@@ -64,6 +91,173 @@ class UniqueNormalizedNameMixin(models.Model):
             )
 
 
+class RenderedMarkdownMixin(models.Model):
+    rendered_fields: dict[str, str]
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(
+        cls,
+        db: str,
+        field_names: list[str],
+        values: list[Any],
+    ) -> "RenderedMarkdownMixin":
+        instance = super().from_db(db, field_names, values)
+        instance._rendered_sources = {
+            source: instance.__dict__[source]
+            for source in cls.rendered_fields
+            if source in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        rendered = self.render_markdown_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *rendered}
+
+        super().save(*args, **kwargs)
+
+    def render_markdown_fields(self, force: bool = False) -> list[str]:
+        sources = getattr(self, "_rendered_sources", {})
+        rendered = []
+        for source, target in self.rendered_fields.items():
+            if source not in self.__dict__:
+                continue
+
+            value = self.__dict__[source]
+            if not force and sources.get(source) == value:
+                if self.__dict__.get(target) or not value:
+                    continue
+
+            setattr(self, target, render_markdown(value))
+            sources[source] = value
+            rendered.append(target)
+
+        self._rendered_sources = sources
+        return rendered
+
+
+class ThumbnailsMixin(models.Model):
+    thumbnails: dict[str, dict[str, dict[str, Any]]]
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(
+        cls,
+        db: str,
+        field_names: list[str],
+        values: list[Any],
+    ) -> "ThumbnailsMixin":
+        instance = super().from_db(db, field_names, values)
+        instance._thumbnail_sources = {
+            field_name: getattr(instance, field_name).name
+            for field_name in cls.thumbnails
+            if field_name in instance.__dict__
+        }
+        return instance
+
+    @classmethod
+    def get_thumbnail_variants(cls, field_name: str, name: str) -> list[str]:
+        specs = cls.thumbnails[field_name]
+        variants = [
+            variant
+            for variant, spec in specs.items()
+            if spec.get("variant_of") == name
+        ]
+        return sorted(variants, key=lambda variant: specs[variant]["width"])
+
+    def get_thumbnail(
+        self,
+        field_name: str,
+        name: str,
+    ) -> Thumbnail | None:
+        image = getattr(self, field_name)
+        if not image:
+            return None
+
+        if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+            return get_path_thumbnail(self, field_name, name)
+
+        cached = getattr(self, "_thumbnail_cache", {})
+        if (image.name, name) in cached:
+            return cached[image.name, name]
+
+        geometry, options = split_thumbnail_spec(
+            name,
+            self.thumbnails[field_name][name],
+        )
+        thumbnail = get_thumbnail(image, geometry, **options)
+        self.set_cached_thumbnail(field_name, name, thumbnail)
+        return thumbnail
+
+    def generate_thumbnail(
+        self,
+        field_name: str,
+        name: str,
+    ) -> Thumbnail | None:
+        if not getattr(self, field_name):
+            return None
+
+        if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+            return create_path_thumbnail(self, field_name, name)
+
+        return self.get_thumbnail(field_name, name)
+
+    def set_cached_thumbnail(
+        self,
+        field_name: str,
+        name: str,
+        thumbnail: Thumbnail,
+    ) -> None:
+        if not hasattr(self, "_thumbnail_cache"):
+            self._thumbnail_cache = {}
+
+        image = getattr(self, field_name)
+        self._thumbnail_cache[image.name, name] = thumbnail
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        for field_name in self.thumbnails:
+            if field_name not in self.__dict__:
+                continue
+
+            image = getattr(self, field_name)
+            if image and not image._committed:
+                process_image_upload(image)
+
+        super().save(*args, **kwargs)
+
+    def get_changed_images(self) -> list[str]:
+        sources = getattr(self, "_thumbnail_sources", {})
+        changed = []
+        for field_name in self.thumbnails:
+            if field_name not in self.__dict__:
+                continue
+
+            name = getattr(self, field_name).name
+            if name and sources.get(field_name) != name:
+                changed.append(field_name)
+
+            sources[field_name] = name
+
+        self._thumbnail_sources = sources
+        return changed
+
+
+def schedule_thumbnails_cleanup(
+    instance: ThumbnailsMixin,
+    field_name: str,
+    image_name: str,
+) -> None:
+    transaction.on_commit(
+        partial(delete_path_thumbnails, instance, field_name, image_name),
+    )
+
+
 @receiver(models.signals.pre_save)
 def pre_save(
     sender: str,
@@ -74,6 +268,9 @@ def pre_save(
     if not raw:
         return
 
+    if isinstance(instance, RenderedMarkdownMixin):
+        instance.render_markdown_fields()
+
     if not isinstance(
         instance,
         (NormalizedNameMixin, UniqueNormalizedNameMixin),
@@ -83,5 +280,54 @@ def pre_save(
     normalized = normalize_name(instance.name)
     instance.normalized_name = normalized
 
+    if isinstance(instance, UniqueNormalizedNameMixin):
+        reference_cache.invalidate(instance.__class__)
+
+    if isinstance(instance, NormalizedNameMixin):
+        name_index.update(instance)
+
+
+@receiver(models.signals.post_save)
+def post_save(
+    sender: str,
+    instance: Any,
+    raw: bool = False,
+    **kwargs: Any,
+) -> None:
+    if raw or not isinstance(instance, ThumbnailsMixin):
+        return
+
+    previous = dict(getattr(instance, "_thumbnail_sources", {}))
+    changed = instance.get_changed_images()
+    if changed:
+        thumbnail_worker.schedule(instance, changed)
+
+    if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+        for field_name in changed:
+            if previous.get(field_name):
+                schedule_thumbnails_cleanup(
+                    instance,
+                    field_name,
+                    previous[field_name],
+                )
+
+
+@receiver(models.signals.post_delete)
+def post_delete(sender: str, instance: Any, **kwargs: Any) -> None:
+    if isinstance(instance, NormalizedNameMixin):
+        name_index.delete(instance)
+
+    if isinstance(instance, UniqueNormalizedNameMixin):
+        reference_cache.invalidate(instance.__class__)
+
+    if (
+        isinstance(instance, ThumbnailsMixin)
+        and settings.THUMBNAIL_DETERMINISTIC_PATHS
+    ):
+        for field_name in instance.thumbnails:
+            image = instance.__dict__.get(field_name)
+            if image:
+                schedule_thumbnails_cleanup(instance, field_name, str(image))
+
 
 __all__ = []
@@ -0,0 +1,158 @@
+import base64
+import json
+from typing import Any, Iterator
+
+from django.core import exceptions
+from django.db.models import Field, Q
+from django.db.models.query import QuerySet
+
+
+class CursorPage:
+    def __init__(
+        self,
+        object_list: list[Any],
+        next_cursor: str | None,
+    ) -> None:
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    def __init__(
+        self,
+        queryset: QuerySet,
+        ordering: list[str],
+        per_page: int,
+    ) -> None:
+        if ordering[-1].lstrip("-") != "pk":
+            ordering = [*ordering, "pk"]
+
+        self.queryset = queryset
+        self.ordering = ordering
+        self.fields = [field.lstrip("-") for field in ordering]
+        self.per_page = per_page
+
+    def get_page(self, cursor: str | None) -> CursorPage:
+        queryset = self.queryset.order_by(*self.ordering)
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset.values_list(*self.fields)[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+
+        return CursorPage([row[-1] for row in rows], next_cursor)
+
+    def get_object_page(self, cursor: str | None) -> CursorPage:
+        queryset = self.queryset.order_by(*self.ordering)
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        objects = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[: self.per_page]
+            next_cursor = self.encode_cursor(
+                [getattr(objects[-1], field) for field in self.fields],
+            )
+
+        return CursorPage(objects, next_cursor)
+
+    def get_page_from_ids(
+        self,
+        ids: list[Any],
+        cursor: str | None,
+    ) -> CursorPage | None:
+        values = self.decode_cursor(cursor)
+        start = 0
+        if values is not None:
+            try:
+                start = ids.index(values[-1]) + 1
+            except ValueError:
+                return None
+
+        end = start + self.per_page + 1
+        page = ids[start:end]
+        next_cursor = None
+        if len(page) > self.per_page:
+            page = page[: self.per_page]
+            last = (
+                self.queryset.filter(pk=page[-1])
+                .values_list(*self.fields)
+                .first()
+            )
+            if last is None:
+                return None
+
+            next_cursor = self.encode_cursor(last)
+
+        return CursorPage(page, next_cursor)
+
+    def encode_cursor(self, values: tuple | list) -> str:
+        data = json.dumps(
+            {"o": self.ordering, "v": list(values)},
+            default=str,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str | None) -> list[Any] | None:
+        if not cursor:
+            return None
+
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            if data["o"] != self.ordering:
+                return None
+
+            values = data["v"]
+            if len(values) != len(self.fields):
+                return None
+
+            return [
+                self._get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (
+            exceptions.FieldDoesNotExist,
+            exceptions.ValidationError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            return None
+
+    def _get_field(self, name: str) -> Field:
+        opts = self.queryset.model._meta
+        return opts.pk if name == "pk" else opts.get_field(name)
+
+    def _after(self, values: list[Any]) -> Q:
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            strict = Q(**{f"{name}__{lookup}": value})
+            if condition is None:
+                condition = strict
+            else:
+                condition = strict | (Q(**{name: value}) & condition)
+
+        return condition
+
+
+__all__ = []
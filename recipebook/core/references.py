@@ -0,0 +1,62 @@
+from threading import RLock
+
+from django.db import models
+
+from core.cache import get_generation, schedule_bump
+
+ReferenceRow = tuple[int, str, str]
+
+
+class ReferenceData:
+    __slots__ = ("rows", "by_id", "by_normalized_name")
+
+    def __init__(self, rows: list[ReferenceRow]) -> None:
+        self.rows = tuple(rows)
+        self.by_id = {row[0]: row for row in self.rows}
+        self.by_normalized_name = {row[2]: row for row in self.rows}
+
+
+class ReferenceCache:
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._data: dict[str, tuple[int, ReferenceData]] = {}
+
+    def get_version_key(self, model: type[models.Model]) -> str:
+        return f"core:references:{model._meta.label_lower}:version"
+
+    def get_version(self, model: type[models.Model]) -> int:
+        return get_generation(self.get_version_key(model))
+
+    def get(
+        self,
+        model: type[models.Model],
+        version: int | None = None,
+    ) -> ReferenceData:
+        key = self.get_version_key(model)
+        if version is None:
+            version = get_generation(key)
+
+        with self._lock:
+            cached = self._data.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        rows = model.objects.values_list(
+            "pk",
+            model.name.field.name,
+            model.normalized_name.field.name,
+        )
+        data = ReferenceData(list(rows))
+        with self._lock:
+            self._data[key] = (version, data)
+
+        return data
+
+    def invalidate(self, model: type[models.Model]) -> None:
+        schedule_bump(self.get_version_key(model))
+
+
+reference_cache = ReferenceCache()
+
+
+__all__ = []
@@ -0,0 +1,118 @@
+from datetime import timedelta
+import hashlib
+import os
+from pathlib import PurePosixPath
+from typing import Any, Iterator
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage, FileSystemStorage
+from django.db import models
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    content_prefix = "content/"
+
+    def save(
+        self,
+        name: str | None,
+        content: Any,
+        max_length: int | None = None,
+    ) -> str:
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.get_content_name(name, content)
+        return self.save_content(name, content, max_length)
+
+    def save_content(
+        self,
+        name: str,
+        content: File,
+        max_length: int | None = None,
+    ) -> str:
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+
+        return super().save(name, content, max_length)
+
+    def get_content_name(self, name: str, content: File) -> str:
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        suffix = PurePosixPath(name).suffix.lower()
+        return (
+            f"{self.content_prefix}{hexdigest[:2]}/{hexdigest[2:4]}/"
+            f"{hexdigest}{suffix}"
+        )
+
+    def is_content_name(self, name: str) -> bool:
+        return name.startswith(self.content_prefix)
+
+    def delete(self, name: str) -> None:
+        if not self.is_content_name(name):
+            super().delete(name)
+
+    def collect_garbage(self, max_age: timedelta) -> Iterator[str]:
+        threshold = timezone.now() - max_age
+        for name in self.list_content_names():
+            if self.get_modified_time(name) > threshold:
+                continue
+
+            if self.get_reference_count(name) == 0:
+                super().delete(name)
+                yield name
+
+    def list_content_names(self) -> Iterator[str]:
+        pending = [self.content_prefix.rstrip("/")]
+        while pending:
+            path = pending.pop()
+            if not self.exists(path):
+                continue
+
+            directories, files = self.listdir(path)
+            pending.extend(f"{path}/{directory}" for directory in directories)
+            yield from (f"{path}/{file}" for file in files)
+
+    def get_reference_count(self, name: str) -> int:
+        count = 0
+        for model, field in get_storage_fields(self):
+            queryset = model._default_manager.filter(**{field.name: name})
+            count += queryset.count()
+
+        return count
+
+
+def get_storage_fields(
+    storage: Any,
+) -> list[tuple[type[models.Model], models.FileField]]:
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and field.storage is storage
+    ]
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def get_media_storage() -> Any:
+    if settings.MEDIA_CONTENT_ADDRESSED:
+        return content_addressed_storage
+
+    return default_storage
+
+
+__all__ = []
@@ -0,0 +1,45 @@
+from typing import Any
+
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+from django.utils.safestring import SafeText
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(
+    instance: Any,
+    field_name: str,
+    name: str,
+    sizes: str = "100vw",
+    **attrs: Any,
+) -> SafeText:
+    thumbnail = instance.get_thumbnail(field_name, name)
+    if thumbnail is None:
+        return ""
+
+    variants = instance.get_thumbnail_variants(field_name, name)
+    if not variants:
+        return format_html('<img src="{}"{}>', thumbnail.url, flatatt(attrs))
+
+    specs = instance.thumbnails[field_name]
+    srcset = ", ".join(
+        f"{instance.get_thumbnail(field_name, variant).url} "
+        f"{specs[variant]['width']}w"
+        for variant in variants
+    )
+    image_format = specs[variants[0]]["format"].lower()
+    return format_html(
+        '<picture><source type="image/{}" srcset="{}" sizes="{}">'
+        '<img src="{}"{}></picture>',
+        image_format,
+        srcset,
+        sizes,
+        thumbnail.url,
+        flatatt(attrs),
+    )
+
+
+__all__ = []
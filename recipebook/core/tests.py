@@ -0,0 +1,427 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from io import BytesIO, StringIO
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+from django.test import override_settings, TestCase
+from PIL import ExifTags, Image, ImageCms
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from core.cache import (
+    bump_generation,
+    forget_generations,
+    get_generation,
+    remember_generations,
+    schedule_bump,
+)
+from core.images import process_image_upload, validate_image_upload
+from core.management.commands import (
+    benchmark_imports,
+    benchmark_thumbnails,
+    warm_thumbnails,
+)
+from core.models import Generation
+from core.pagination import CursorPaginator
+from core.storage import ContentAddressedStorage
+from core.thumbnails import (
+    create_path_thumbnail,
+    get_cached_thumbnails,
+    get_thumbnail_file,
+)
+from core.utils import MarkdownRenderer
+from recipes.models import Recipe
+
+
+class GenerationTests(TestCase):
+    def test_missing_generation_is_zero(self) -> None:
+        self.assertEqual(get_generation("tests:missing"), 0)
+
+    def test_bump_is_stored_in_database(self) -> None:
+        self.assertEqual(bump_generation("tests:key"), 1)
+        self.assertEqual(bump_generation("tests:key"), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_generation("tests:key"), 2)
+
+    def test_generation_is_read_once_per_request(self) -> None:
+        bump_generation("tests:key")
+        remember_generations()
+        self.addCleanup(forget_generations)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_generation("tests:key"), 1)
+            self.assertEqual(get_generation("tests:key"), 1)
+
+        bump_generation("tests:key")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_generation("tests:key"), 2)
+
+    def test_scheduled_bumps_are_coalesced(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                schedule_bump("tests:key")
+                schedule_bump("tests:other")
+
+        self.assertEqual(get_generation("tests:key"), 1)
+        self.assertEqual(get_generation("tests:other"), 1)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Generation.objects.bulk_create(
+            Generation(key=f"key{i}", value=i // 3) for i in range(7)
+        )
+
+    def get_paginator(self, per_page: int) -> CursorPaginator:
+        return CursorPaginator(Generation.objects.all(), ["-value"], per_page)
+
+    def walk(self, paginator: CursorPaginator) -> list[list[str]]:
+        pages = []
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(list(page))
+            if not page.has_next():
+                return pages
+
+            cursor = page.next_cursor
+
+    def test_ties_are_split_across_pages(self) -> None:
+        pages = self.walk(self.get_paginator(2))
+        self.assertEqual(
+            pages,
+            [
+                ["key6", "key3"],
+                ["key4", "key5"],
+                ["key0", "key1"],
+                ["key2"],
+            ],
+        )
+
+    def test_exact_last_page_has_no_next(self) -> None:
+        pages = self.walk(self.get_paginator(7))
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(len(pages[0]), 7)
+
+    def test_object_page_matches_value_page(self) -> None:
+        paginator = self.get_paginator(3)
+        page = paginator.get_page(None)
+        object_page = paginator.get_object_page(None)
+        self.assertEqual([obj.pk for obj in object_page], list(page))
+        self.assertEqual(
+            [obj.pk for obj in paginator.get_object_page(page.next_cursor)],
+            list(paginator.get_page(object_page.next_cursor)),
+        )
+
+    def test_invalid_cursor_starts_over(self) -> None:
+        paginator = self.get_paginator(2)
+        first = list(paginator.get_page(None))
+        other = CursorPaginator(Generation.objects.all(), ["value"], 2)
+        for cursor in ("", "garbage", "e30", other.get_page(None).next_cursor):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(paginator.get_page(cursor)), first)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def age(self, name: str, seconds: int) -> None:
+        timestamp = time.time() - seconds
+        os.utime(self.storage.path(name), (timestamp, timestamp))
+
+    def test_identical_content_shares_name(self) -> None:
+        first = self.storage.save("a.JPG", ContentFile(b"data"))
+        second = self.storage.save("b.jpg", ContentFile(b"data"))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(self.storage.content_prefix))
+        self.assertTrue(first.endswith(".jpg"))
+
+    def test_reuse_refreshes_modified_time(self) -> None:
+        name = self.storage.save("a.jpg", ContentFile(b"data"))
+        self.age(name, 3600)
+        self.storage.save("b.jpg", ContentFile(b"data"))
+        age = time.time() - os.path.getmtime(self.storage.path(name))
+        self.assertLess(age, 60)
+
+    def test_save_content_does_not_hash_again(self) -> None:
+        content = ContentFile(b"data")
+        name = self.storage.get_content_name("a.jpg", content)
+        with mock.patch.object(
+            self.storage,
+            "get_content_name",
+        ) as get_content_name:
+            self.storage.save_content(name, content)
+
+        get_content_name.assert_not_called()
+        self.assertTrue(self.storage.exists(name))
+
+    def test_delete_defers_content_files(self) -> None:
+        name = self.storage.save("a.jpg", ContentFile(b"data"))
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+        legacy = self.storage.save_content("old/a.jpg", ContentFile(b"x"))
+        self.storage.delete(legacy)
+        self.assertFalse(self.storage.exists(legacy))
+
+    def test_collect_garbage(self) -> None:
+        old = self.storage.save("a.jpg", ContentFile(b"old"))
+        referenced = self.storage.save("b.jpg", ContentFile(b"referenced"))
+        recent = self.storage.save("c.jpg", ContentFile(b"recent"))
+        self.age(old, 7200)
+        self.age(referenced, 7200)
+
+        with mock.patch.object(
+            self.storage,
+            "get_reference_count",
+            side_effect=lambda name: int(name == referenced),
+        ):
+            collected = list(self.storage.collect_garbage(timedelta(hours=1)))
+
+        self.assertEqual(collected, [old])
+        self.assertFalse(self.storage.exists(old))
+        self.assertTrue(self.storage.exists(referenced))
+        self.assertTrue(self.storage.exists(recent))
+
+
+class WarmThumbnailsTests(TestCase):
+    def test_failed_image_does_not_stop_warm_up(self) -> None:
+        command = warm_thumbnails.Command(stdout=StringIO(), stderr=StringIO())
+        command.generated = 0
+        command.failed = 0
+        generated = Future()
+        generated.set_result(3)
+        failed = Future()
+        failed.set_exception(OSError("broken image"))
+        command.submitted = {
+            generated: ("recipes.Recipe", 1),
+            failed: ("recipes.Recipe", 2),
+        }
+
+        command.collect({generated, failed})
+
+        self.assertEqual(command.generated, 3)
+        self.assertEqual(command.failed, 1)
+        self.assertEqual(command.submitted, {})
+        errors = command.stderr.getvalue()
+        self.assertIn("recipes.Recipe pk 2", errors)
+        self.assertIn("broken image", errors)
+
+
+class ImportTimeTests(TestCase):
+    def test_startup_does_not_import_lazy_modules(self) -> None:
+        timings = benchmark_imports.measure_imports("check")
+
+        names = {name for name, _, _ in timings}
+        self.assertIn("core.utils", names)
+        self.assertEqual(benchmark_imports.get_lazy_imports(timings), [])
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIZE=64)
+class ImageUploadTests(TestCase):
+    icc_profile = ImageCms.ImageCmsProfile(
+        ImageCms.createProfile("sRGB"),
+    ).tobytes()
+
+    def get_upload(
+        self,
+        size: tuple[int, int],
+        orientation: int = 1,
+        gps: bool = False,
+    ) -> Any:
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        if gps:
+            exif[ExifTags.Base.Make] = "Camera"
+            exif[ExifTags.IFD.GPSInfo] = {
+                ExifTags.GPS.GPSLatitudeRef: "N",
+                ExifTags.GPS.GPSLatitude: (55.0, 45.0, 0.0),
+            }
+
+        output = BytesIO()
+        Image.new("RGB", size, "red").save(
+            output,
+            format="JPEG",
+            icc_profile=self.icc_profile,
+            exif=exif,
+        )
+        image = ImageFieldFile(None, models.ImageField(), "image.jpg")
+        image.file = ContentFile(output.getvalue(), name="image.jpg")
+        image._committed = False
+        return image
+
+    def read(self, image: ImageFieldFile) -> bytes:
+        image.seek(0)
+        return image.read()
+
+    def open_image(self, image: ImageFieldFile) -> Image.Image:
+        return Image.open(BytesIO(self.read(image)))
+
+    def test_small_image_metadata_is_stripped(self) -> None:
+        image = self.get_upload((32, 16), gps=True)
+        with self.open_image(image) as upload:
+            gps_info = upload.getexif().get_ifd(ExifTags.IFD.GPSInfo)
+            self.assertEqual(gps_info[ExifTags.GPS.GPSLatitudeRef], "N")
+
+        process_image_upload(image)
+        with self.open_image(image) as processed:
+            self.assertEqual(processed.size, (32, 16))
+            self.assertEqual(dict(processed.getexif()), {})
+            self.assertNotIn("exif", processed.info)
+            self.assertEqual(processed.info["icc_profile"], self.icc_profile)
+
+    def test_large_image_is_resized_with_profile(self) -> None:
+        image = self.get_upload((256, 128))
+        process_image_upload(image)
+        with self.open_image(image) as processed:
+            self.assertEqual(processed.size, (64, 32))
+            self.assertEqual(processed.format, "JPEG")
+            self.assertEqual(processed.info["icc_profile"], self.icc_profile)
+
+    def test_rotated_image_is_transposed(self) -> None:
+        image = self.get_upload((32, 16), orientation=6)
+        process_image_upload(image)
+        with self.open_image(image) as processed:
+            self.assertEqual(processed.size, (16, 32))
+            self.assertEqual(dict(processed.getexif()), {})
+            self.assertEqual(processed.info["icc_profile"], self.icc_profile)
+
+    def test_invalid_image_is_left_to_validation(self) -> None:
+        image = self.get_upload((32, 16))
+        image.file = ContentFile(b"not an image", name="image.jpg")
+        process_image_upload(image)
+        self.assertEqual(self.read(image), b"not an image")
+        with self.assertRaises(ValidationError):
+            validate_image_upload(image)
+
+
+class SorlThumbnailTests(TestCase):
+    specs = (
+        ("500", {"quality": 85}),
+        ("128x128", {"crop": "center", "quality": 51}),
+        ("160", {"format": "WEBP", "quality": 80}),
+    )
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        cache.clear()
+        output = BytesIO()
+        Image.new("RGB", (600, 300), "red").save(output, format="JPEG")
+        self.name = default_storage.save(
+            "source.jpg",
+            ContentFile(output.getvalue()),
+        )
+        self.image = ImageFieldFile(None, models.ImageField(), self.name)
+
+    def test_thumbnail_file_matches_sorl(self) -> None:
+        for geometry, options in self.specs:
+            with self.subTest(geometry=geometry, options=options):
+                thumbnail = get_thumbnail_file(self.image, geometry, options)
+                key = add_prefix(thumbnail.key)
+                self.assertEqual(get_cached_thumbnails([key]), {})
+
+                expected = get_thumbnail(self.image, geometry, **options)
+                self.assertEqual(thumbnail.name, expected.name)
+                self.assertIn(key, get_cached_thumbnails([key]))
+
+    def test_benchmark_renders_like_sorl(self) -> None:
+        for geometry, options in self.specs:
+            with self.subTest(geometry=geometry, options=options):
+                rendered = benchmark_thumbnails.render_thumbnail(
+                    ImageFile(self.image),
+                    geometry,
+                    options,
+                )
+                expected = get_thumbnail(self.image, geometry, **options)
+                self.assertEqual(rendered, expected.read())
+
+    def test_benchmark_reports_variants(self) -> None:
+        default_storage.save(f"recipes/main_image/{self.name}", self.image)
+        output = StringIO()
+        call_command(
+            "benchmark_thumbnails",
+            media_root=settings.MEDIA_ROOT,
+            formats=["webp", "jpeg"],
+            stdout=output,
+        )
+        report = output.getvalue()
+        self.assertIn("recipes.Recipe.main_image 500: 1 images, JPEG", report)
+        for variant in ("WEBP 160w", "JPEG 160w", "WEBP 500w"):
+            self.assertIn(variant, report)
+
+    def test_create_path_thumbnail(self) -> None:
+        recipe = Recipe(main_image=self.name)
+        field_name = Recipe.main_image.field.name
+        for name, size in (("500", (500, 250)), ("128x128", (128, 128))):
+            with self.subTest(name=name):
+                thumbnail = create_path_thumbnail(recipe, field_name, name)
+                self.assertTrue(thumbnail.exists())
+                with default_storage.open(thumbnail.name) as file:
+                    with Image.open(file) as created:
+                        self.assertEqual(created.size, size)
+
+
+class MarkdownRendererTests(TestCase):
+    def get_text(self, index: int) -> str:
+        return (
+            f"# Заголовок {index}\n\n"
+            f"**Жирный {index}** ~~зачёркнутый~~ :smile:\n\n"
+            f"| a | b |\n| --- | --- |\n| {index} | {index * 2} |\n\n"
+            f"- [x] пункт {index}\n"
+        )
+
+    def test_concurrent_renders_match_sequential(self) -> None:
+        threads_count = 8
+        texts = [self.get_text(index) for index in range(400)]
+        renderer = MarkdownRenderer()
+        expected = [renderer.render(text) for text in texts]
+        barrier = threading.Barrier(threads_count)
+        rendered = [""] * len(texts)
+        instances = set()
+
+        def render(start: int) -> None:
+            barrier.wait(timeout=10)
+            instances.add(id(renderer.get_markdown()))
+            for index in range(start, len(texts), threads_count):
+                rendered[index] = renderer.render(texts[index])
+
+        threads = [
+            threading.Thread(target=render, args=[start])
+            for start in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(rendered, expected)
+        self.assertEqual(len(instances), threads_count)
+
+    def test_render_resets_state(self) -> None:
+        renderer = MarkdownRenderer()
+        first = renderer.render("[a]: https://example.com\n\n[link][a]")
+        self.assertIn('href="https://example.com"', first)
+        self.assertNotIn("href", renderer.render("[link][a]"))
+
+
+__all__ = []
@@ -0,0 +1,331 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import logging
+from multiprocessing import get_context
+from threading import Lock
+from typing import Any, Iterable
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.fields.files import ImageFieldFile
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import deserialize_image_file, ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SPEC_KEYS = ("geometry", "variant_of", "width")
+
+
+def get_variant_specs(
+    geometry: str,
+    widths: list[int],
+    image_format: str = "WEBP",
+    **options: Any,
+) -> dict[str, dict[str, Any]]:
+    width, _, height = geometry.partition("x")
+    specs = {}
+    for variant_width in widths:
+        variant = str(variant_width)
+        if height:
+            variant_height = round(variant_width * int(height) / int(width))
+            variant += f"x{variant_height}"
+
+        specs[f"{geometry}:{variant_width}w"] = {
+            "geometry": variant,
+            "variant_of": geometry,
+            "width": variant_width,
+            "format": image_format,
+            **options,
+        }
+
+    return specs
+
+
+def split_thumbnail_spec(
+    name: str,
+    spec: dict[str, Any],
+) -> tuple[str, dict[str, Any]]:
+    options = {
+        key: value
+        for key, value in spec.items()
+        if key not in THUMBNAIL_SPEC_KEYS
+    }
+    return spec.get("geometry", name), options
+
+
+def get_thumbnail_options(
+    source: ImageFile,
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", backend._get_format(source))
+
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+
+    return options
+
+
+def get_thumbnail_file(
+    image: ImageFieldFile,
+    geometry: str,
+    options: dict[str, Any],
+) -> ImageFile:
+    source = ImageFile(image)
+    options = get_thumbnail_options(source, options)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def get_thumbnail_path(
+    instance: Any,
+    field_name: str,
+    name: str,
+    image_name: str | None = None,
+) -> str:
+    if image_name is None:
+        image_name = getattr(instance, field_name).name
+
+    _, options = split_thumbnail_spec(
+        name,
+        instance.thumbnails[field_name][name],
+    )
+    options = get_thumbnail_options(ImageFile(image_name), options)
+    return "{}{}/{}/{}/{}.{}".format(
+        settings.THUMBNAIL_PATHS_PREFIX,
+        instance._meta.label_lower,
+        field_name,
+        name.replace(":", "-"),
+        image_name,
+        EXTENSIONS[options["format"]],
+    )
+
+
+def get_path_thumbnail(instance: Any, field_name: str, name: str) -> ImageFile:
+    return ImageFile(
+        get_thumbnail_path(instance, field_name, name),
+        default.storage,
+    )
+
+
+def delete_path_thumbnails(
+    instance: Any,
+    field_name: str,
+    image_name: str,
+) -> None:
+    for name in instance.thumbnails[field_name]:
+        default.storage.delete(
+            get_thumbnail_path(instance, field_name, name, image_name),
+        )
+
+
+def create_path_thumbnail(
+    instance: Any,
+    field_name: str,
+    name: str,
+) -> ImageFile:
+    thumbnail = get_path_thumbnail(instance, field_name, name)
+    if thumbnail.exists():
+        return thumbnail
+
+    source = ImageFile(getattr(instance, field_name))
+    geometry, options = split_thumbnail_spec(
+        name,
+        instance.thumbnails[field_name][name],
+    )
+    options = get_thumbnail_options(source, options)
+    source_image = default.engine.get_image(source)
+    try:
+        options["image_info"] = default.engine.get_image_info(source_image)
+        default.backend._create_thumbnail(
+            source_image,
+            geometry,
+            options,
+            thumbnail,
+        )
+    finally:
+        default.engine.cleanup(source_image)
+
+    return thumbnail
+
+
+def get_cached_thumbnails(keys: list[str]) -> dict[str, str]:
+    from sorl.thumbnail.models import KVStore
+
+    kv_cache = getattr(default.kvstore, "cache", None)
+    if kv_cache is None:
+        return {}
+
+    values = {
+        key: value
+        for key, value in kv_cache.get_many(keys).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(
+            KVStore.objects.filter(key__in=missing).values_list(
+                "key",
+                "value",
+            ),
+        )
+        kv_cache.set_many(found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+
+    return values
+
+
+def prefetch_thumbnails(
+    instances: Iterable[Any],
+    field_name: str,
+    *names: str,
+) -> None:
+    if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+        return
+
+    keys = {}
+    for instance in instances:
+        image = getattr(instance, field_name)
+        if not image:
+            continue
+
+        for name in names:
+            geometry, options = split_thumbnail_spec(
+                name,
+                instance.thumbnails[field_name][name],
+            )
+            thumbnail = get_thumbnail_file(image, geometry, options)
+            keys.setdefault(add_prefix(thumbnail.key), []).append(
+                (instance, name),
+            )
+
+    values = get_cached_thumbnails(list(keys))
+    for key, value in values.items():
+        for instance, name in keys[key]:
+            instance.set_cached_thumbnail(
+                field_name,
+                name,
+                deserialize_image_file(value),
+            )
+
+
+def generate_thumbnails(
+    label: str,
+    pk: Any,
+    specs: list[tuple[str, str]],
+) -> int:
+    model = apps.get_model(label)
+    field_names = {field_name for field_name, _ in specs}
+    instance = model.objects.only(*field_names).filter(pk=pk).first()
+    if instance is None:
+        return 0
+
+    generated = 0
+    for field_name, name in specs:
+        if instance.generate_thumbnail(field_name, name) is not None:
+            generated += 1
+
+    return generated
+
+
+def create_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def get_thumbnail_specs(
+    instance: Any,
+    field_names: Iterable[str],
+) -> list[tuple[str, str]]:
+    return [
+        (field_name, name)
+        for field_name in field_names
+        for name in instance.thumbnails[field_name]
+    ]
+
+
+class ThumbnailWorker:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def schedule(self, instance: models.Model, field_names: list[str]) -> None:
+        transaction.on_commit(
+            partial(
+                self.submit,
+                instance._meta.label,
+                instance.pk,
+                get_thumbnail_specs(instance, field_names),
+            ),
+        )
+
+    def submit(
+        self,
+        label: str,
+        pk: Any,
+        specs: list[tuple[str, str]],
+    ) -> None:
+        if settings.THUMBNAIL_WORKERS == 0:
+            generate_thumbnails(label, pk, specs)
+            return
+
+        try:
+            future = self.get_executor().submit(
+                generate_thumbnails,
+                label,
+                pk,
+                specs,
+            )
+        except BrokenProcessPool:
+            self.reset()
+            future = self.get_executor().submit(
+                generate_thumbnails,
+                label,
+                pk,
+                specs,
+            )
+
+        future.add_done_callback(self._log_error)
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = create_executor(settings.THUMBNAIL_WORKERS)
+
+            return self._executor
+
+    def reset(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _log_error(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                "Thumbnail generation failed",
+                exc_info=future.exception(),
+            )
+
+
+thumbnail_worker = ThumbnailWorker()
+
+
+__all__ = []
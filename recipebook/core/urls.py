@@ -0,0 +1,12 @@
+from django.urls import path
+
+from core import views
+
+app_name = "core"
+
+urlpatterns = [
+    path("<path:path>", views.ThumbnailView.as_view(), name="thumbnail"),
+]
+
+
+__all__ = []
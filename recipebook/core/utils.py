@@ -1,12 +1,14 @@
 from pathlib import Path
 import re
-from typing import Any
+from threading import local
+from typing import Any, TYPE_CHECKING
 from unicodedata import normalize
 import uuid
 
 from django.utils.deconstruct import deconstructible
-from markdown import Markdown
-from pymdownx import emoji
+
+if TYPE_CHECKING:
+    from markdown import Markdown
 
 SIMILAR_CHARS = {
     "a": "а",
@@ -38,18 +40,22 @@ class Thumbnail:
     url: str
 
 
-MD = Markdown(
-    extensions=[
-        "markdown.extensions.tables",
-        "pymdownx.magiclink",
-        "pymdownx.betterem",
-        "pymdownx.tilde",
-        "pymdownx.emoji",
-        "pymdownx.tasklist",
-        "pymdownx.superfences",
-        "pymdownx.saneheaders",
-    ],
-    extension_configs={
+MARKDOWN_EXTENSIONS = [
+    "markdown.extensions.tables",
+    "pymdownx.magiclink",
+    "pymdownx.betterem",
+    "pymdownx.tilde",
+    "pymdownx.emoji",
+    "pymdownx.tasklist",
+    "pymdownx.superfences",
+    "pymdownx.saneheaders",
+]
+
+
+def get_markdown_extension_configs() -> dict[str, dict[str, Any]]:
+    from pymdownx import emoji
+
+    return {
         "pymdownx.magiclink": {
             "repo_url_shortener": True,
             "repo_url_shorthand": True,
@@ -67,12 +73,34 @@ MD = Markdown(
                 },
             },
         },
-    },
-)
+    }
+
+
+class MarkdownRenderer(local):
+    def get_markdown(self) -> "Markdown":
+        if getattr(self, "md", None) is None:
+            from markdown import Markdown
+
+            self.md = Markdown(
+                extensions=MARKDOWN_EXTENSIONS,
+                extension_configs=get_markdown_extension_configs(),
+            )
+
+        return self.md
+
+    def render(self, text: str) -> str:
+        md = self.get_markdown()
+        try:
+            return md.convert(text)
+        finally:
+            md.reset()
+
+
+markdown_renderer = MarkdownRenderer()
 
 
 def render_markdown(text: str) -> str:
-    return MD.convert(text)
+    return markdown_renderer.render(text)
 
 
 def make_admin_fieldsets(
@@ -0,0 +1,40 @@
+from django.apps import apps
+from django.http import FileResponse, Http404, HttpRequest
+from django.views.generic import View
+from sorl.thumbnail import default
+
+from core.models import ThumbnailsMixin
+from core.thumbnails import create_path_thumbnail
+
+
+class ThumbnailView(View):
+    def get(self, request: HttpRequest, path: str) -> FileResponse:
+        try:
+            label, field_name, name, image_name = path.split("/", 3)
+            model = apps.get_model(label)
+        except (LookupError, ValueError):
+            raise Http404()
+
+        if not issubclass(model, ThumbnailsMixin):
+            raise Http404()
+
+        specs = model.thumbnails.get(field_name, {})
+        names = {spec_name.replace(":", "-"): spec_name for spec_name in specs}
+        if name not in names:
+            raise Http404()
+
+        instance = (
+            model.objects.filter(
+                **{field_name: image_name.rsplit(".", 1)[0]},
+            )
+            .only(field_name)
+            .first()
+        )
+        if instance is None:
+            raise Http404()
+
+        thumbnail = create_path_thumbnail(instance, field_name, names[name])
+        return FileResponse(default.storage.open(thumbnail.name))
+
+
+__all__ = []
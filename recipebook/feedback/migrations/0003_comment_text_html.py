@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback", "0002_cooked"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="text_html",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback", "0003_comment_text_html"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["recipe", "created"],
+                name="feedback_comment_recipe_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["author", "recipe"], name="feedback_comment_author_idx"
+            ),
+        ),
+    ]
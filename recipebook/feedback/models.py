@@ -1,7 +1,11 @@
+from typing import Any
+
 from django.db import models
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from mdeditor.fields import MDTextField
 
+from core.models import RenderedMarkdownMixin
 from core.utils import render_markdown
 from recipes.models import Recipe
 from users.models import User
@@ -15,7 +19,9 @@ class RatingChoices(models.IntegerChoices):
     LOVE = 5, _("rating__rating_choices__love")
 
 
-class Comment(models.Model):
+class Comment(RenderedMarkdownMixin, models.Model):
+    rendered_fields = {"text": "text_html"}
+
     author = models.ForeignKey(
         User,
         related_name="comments",
@@ -40,12 +46,27 @@ class Comment(models.Model):
         max_length=2047,
         verbose_name=_("feedback__model__comment__text"),
     )
+    text_html = models.TextField(
+        editable=False,
+        blank=True,
+        default="",
+    )
 
     class Meta:
         verbose_name = _("feedback__model__comment__verbose_name")
         verbose_name_plural = _(
             "feedback__model__comment__verbose_name_plural",
         )
+        indexes = [
+            models.Index(
+                fields=["recipe", "created"],
+                name="feedback_comment_recipe_idx",
+            ),
+            models.Index(
+                fields=["author", "recipe"],
+                name="feedback_comment_author_idx",
+            ),
+        ]
 
     def __str__(self):
         return _("feedback__model__comment__str") % {
@@ -55,6 +76,9 @@ class Comment(models.Model):
         }
 
     def get_rendered_text(self) -> str:
+        if self.text_html or not self.text:
+            return self.text_html
+
         return render_markdown(self.text)
 
 
@@ -87,6 +111,44 @@ class Rate(models.Model):
             "recipe": self.recipe_id,
         }
 
+    @classmethod
+    def from_db(
+        cls,
+        db: str,
+        field_names: list[str],
+        values: list[Any],
+    ) -> "Rate":
+        instance = super().from_db(db, field_names, values)
+        instance.set_saved_rating()
+        return instance
+
+    @classmethod
+    def from_user_feedback(cls, recipe: Recipe, user: User) -> "Rate | None":
+        if getattr(recipe, "user_rating_id", None) is None:
+            return None
+
+        return cls.from_db(
+            recipe._state.db,
+            [
+                cls._meta.pk.attname,
+                cls.author.field.attname,
+                cls.recipe.field.attname,
+                cls.value.field.attname,
+            ],
+            [
+                recipe.user_rating_id,
+                user.pk,
+                recipe.pk,
+                recipe.user_rating_value,
+            ],
+        )
+
+    def set_saved_rating(self) -> None:
+        self._saved_rating = (
+            self.__dict__.get(self.__class__.recipe.field.attname),
+            self.__dict__.get(self.__class__.value.field.attname),
+        )
+
 
 class Cooked(models.Model):
     author = models.ForeignKey(
@@ -114,5 +176,74 @@ class Cooked(models.Model):
             "recipe": self.recipe_id,
         }
 
+    @classmethod
+    def from_user_feedback(
+        cls,
+        recipe: Recipe,
+        user: User,
+    ) -> "Cooked | None":
+        if getattr(recipe, "user_cooked_id", None) is None:
+            return None
+
+        return cls.from_db(
+            recipe._state.db,
+            [
+                cls._meta.pk.attname,
+                cls.author.field.attname,
+                cls.recipe.field.attname,
+            ],
+            [recipe.user_cooked_id, user.pk, recipe.pk],
+        )
+
+
+@receiver(models.signals.post_save, sender=Rate)
+def update_recipe_rating(
+    sender: type[Rate],
+    instance: Rate,
+    created: bool,
+    **kwargs: Any,
+) -> None:
+    saved_recipe_id, saved_value = getattr(
+        instance,
+        "_saved_rating",
+        (None, None),
+    )
+    if created:
+        Recipe.objects.update_rating(instance.recipe_id, instance.value, 1)
+    elif saved_recipe_id is None or saved_value is None:
+        Recipe.objects.reconcile_ratings(
+            Recipe.objects.filter(pk__in=[instance.recipe_id]),
+        )
+    elif saved_recipe_id != instance.recipe_id:
+        Recipe.objects.update_rating(saved_recipe_id, -saved_value, -1)
+        Recipe.objects.update_rating(instance.recipe_id, instance.value, 1)
+    elif saved_value != instance.value:
+        Recipe.objects.update_rating(
+            instance.recipe_id,
+            instance.value - saved_value,
+            0,
+        )
+
+    instance.set_saved_rating()
+
+
+@receiver(models.signals.post_delete, sender=Rate)
+def remove_recipe_rating(
+    sender: type[Rate],
+    instance: Rate,
+    **kwargs: Any,
+) -> None:
+    saved_recipe_id, saved_value = getattr(
+        instance,
+        "_saved_rating",
+        (None, None),
+    )
+    if saved_recipe_id is None or saved_value is None:
+        Recipe.objects.reconcile_ratings(
+            Recipe.objects.filter(pk__in=[instance.recipe_id]),
+        )
+    else:
+        Recipe.objects.update_rating(saved_recipe_id, -saved_value, -1)
+
 
 __all__ = []
@@ -0,0 +1,107 @@
+from django.http import HttpResponse
+from django.urls import reverse
+
+from feedback.models import Comment, Cooked, Rate
+from recipes.models import Recipe, RecipeState
+from recipes.tests import RecipeTestCase
+
+
+class FeedbackViewTests(RecipeTestCase):
+    endpoints = (
+        "rate",
+        "unrate",
+        "cooked",
+        "uncooked",
+        "comment",
+        "delete-comment",
+    )
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.draft = cls.create_recipe(
+            "Черновик",
+            [cls.salt],
+            state=RecipeState.MODERATED,
+        )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def post(
+        self,
+        name: str,
+        data: dict | None = None,
+        recipe: Recipe | None = None,
+    ) -> HttpResponse:
+        recipe = recipe or self.bread
+        return self.client.post(
+            reverse(f"feedback:{name}", args=[recipe.pk]),
+            data or {},
+        )
+
+    def test_anonymous_is_forbidden(self) -> None:
+        self.client.logout()
+        for name in self.endpoints:
+            with self.subTest(name=name):
+                self.assertEqual(self.post(name).status_code, 403)
+
+    def test_unpublished_recipe_is_not_found(self) -> None:
+        data = {"value": 5, "text": "Вкусно"}
+        for name in self.endpoints:
+            with self.subTest(name=name):
+                response = self.post(name, data, recipe=self.draft)
+                self.assertEqual(response.status_code, 404)
+
+    def test_get_is_not_allowed(self) -> None:
+        response = self.client.get(
+            reverse("feedback:rate", args=[self.bread.pk]),
+        )
+        self.assertEqual(response.status_code, 405)
+
+    def test_rate_and_unrate(self) -> None:
+        data = self.post("rate", {"value": 4}).json()
+        self.assertEqual(data["rating"], 4)
+        self.assertEqual(data["rating_count"], 1)
+        self.assertEqual(data["user_rating"], 4)
+
+        data = self.post("rate", {"value": 2}).json()
+        self.assertEqual(data["rating"], 2)
+        self.assertEqual(data["rating_count"], 1)
+        self.assertEqual(Rate.objects.get(author=self.user).value, 2)
+
+        data = self.post("unrate").json()
+        self.assertEqual(data["rating_count"], 0)
+        self.assertIsNone(data["user_rating"])
+        self.assertFalse(Rate.objects.exists())
+
+    def test_invalid_rating_is_rejected(self) -> None:
+        response = self.post("rate", {"value": 9})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("value", response.json()["errors"])
+
+    def test_cooked_and_uncooked(self) -> None:
+        self.assertEqual(self.post("cooked").json(), {"cooked": True})
+        self.assertEqual(self.post("cooked").json(), {"cooked": True})
+        self.assertEqual(Cooked.objects.count(), 1)
+
+        self.assertEqual(self.post("uncooked").json(), {"cooked": False})
+        self.assertFalse(Cooked.objects.exists())
+
+    def test_comment_and_delete(self) -> None:
+        data = self.post("comment", {"text": "**Вкусно**"}).json()
+        self.assertTrue(data["has_comment"])
+        self.assertIn("<strong>Вкусно</strong>", data["text_html"])
+
+        self.post("comment", {"text": "Очень вкусно"})
+        comment = Comment.objects.get(author=self.user)
+        self.assertEqual(comment.text, "Очень вкусно")
+        self.assertEqual(comment.recipe, self.bread)
+
+        data = self.post("delete-comment").json()
+        self.assertEqual(data, {"has_comment": False})
+        self.assertFalse(Comment.objects.exists())
+
+
+__all__ = []
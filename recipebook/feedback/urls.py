@@ -0,0 +1,38 @@
+from django.urls import path
+
+from feedback import views
+
+app_name = "feedback"
+
+urlpatterns = [
+    path(
+        "recipe/<int:pk>/rate",
+        views.RateView.as_view(),
+        name="rate",
+    ),
+    path(
+        "recipe/<int:pk>/unrate",
+        views.UnrateView.as_view(),
+        name="unrate",
+    ),
+    path(
+        "recipe/<int:pk>/cooked",
+        views.CookedView.as_view(),
+        name="cooked",
+    ),
+    path(
+        "recipe/<int:pk>/uncooked",
+        views.UncookedView.as_view(),
+        name="uncooked",
+    ),
+    path(
+        "recipe/<int:pk>/comment",
+        views.CommentView.as_view(),
+        name="comment",
+    ),
+    path(
+        "recipe/<int:pk>/comment/delete",
+        views.DeleteCommentView.as_view(),
+        name="delete-comment",
+    ),
+]
@@ -0,0 +1,154 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.db.models.query import QuerySet
+from django.http import Http404, HttpRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import ngettext
+from django.views.generic import View
+
+from feedback.forms import CommentForm, RatingForm
+from feedback.models import Comment, Cooked, Rate
+from recipes.models import Recipe
+
+
+class RecipeFeedbackView(LoginRequiredMixin, View):
+    raise_exception = True
+    http_method_names = ["post"]
+    model: type[Rate | Cooked | Comment]
+
+    def get_recipe(self, pk: int) -> Recipe:
+        return get_object_or_404(
+            Recipe.objects.published().only("pk"),
+            pk=pk,
+        )
+
+    def get_user_queryset(self, pk: int) -> QuerySet:
+        return self.model.objects.filter(
+            **{
+                self.model.author.field.name: self.request.user,
+                self.model.recipe.field.attname: pk,
+            },
+        )
+
+    def get_rating_response(
+        self,
+        pk: int,
+        user_rating: int | None,
+    ) -> JsonResponse:
+        aggregates = (
+            Recipe.objects.filter(pk=pk)
+            .values_list(
+                Recipe.rating.field.name,
+                Recipe.rating_count.field.name,
+            )
+            .first()
+        )
+        if aggregates is None:
+            raise Http404
+
+        rating = round(aggregates[0], 2)
+        rating_count = aggregates[1]
+        rating_display = ngettext(
+            "recipe__rating %(counter)s%(rating)s",
+            "recipe__rating %(counter)s%(rating)s",
+            rating_count,
+        ) % {"counter": rating_count, "rating": rating}
+        return JsonResponse(
+            {
+                "rating": rating,
+                "rating_count": rating_count,
+                "rating_display": rating_display,
+                "user_rating": user_rating,
+            },
+        )
+
+
+class RateView(RecipeFeedbackView):
+    model = Rate
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        form = RatingForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        recipe = get_object_or_404(
+            Recipe.objects.with_user_feedback(
+                Recipe.objects.published().only("pk"),
+                request.user,
+            ),
+            pk=pk,
+        )
+        value = form.cleaned_data[Rate.value.field.name]
+        user_rating = Rate.from_user_feedback(recipe, request.user)
+        if user_rating is None:
+            user_rating = Rate(author=request.user, recipe=recipe)
+
+        if user_rating.pk is None or user_rating.value != value:
+            user_rating.value = value
+            with transaction.atomic():
+                user_rating.save()
+
+        return self.get_rating_response(pk, value)
+
+
+class UnrateView(RecipeFeedbackView):
+    model = Rate
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        self.get_recipe(pk)
+        with transaction.atomic():
+            self.get_user_queryset(pk).delete()
+
+        return self.get_rating_response(pk, None)
+
+
+class CookedView(RecipeFeedbackView):
+    model = Cooked
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        recipe = self.get_recipe(pk)
+        Cooked.objects.get_or_create(author=request.user, recipe=recipe)
+        return JsonResponse({"cooked": True})
+
+
+class UncookedView(RecipeFeedbackView):
+    model = Cooked
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        self.get_recipe(pk)
+        self.get_user_queryset(pk).delete()
+        return JsonResponse({"cooked": False})
+
+
+class CommentView(RecipeFeedbackView):
+    model = Comment
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        recipe = self.get_recipe(pk)
+        user_comment = self.get_user_queryset(pk).first()
+        form = CommentForm(request.POST, instance=user_comment)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        user_comment = form.save(False)
+        user_comment.author = request.user
+        user_comment.recipe = recipe
+        user_comment.save()
+        return JsonResponse(
+            {
+                "has_comment": True,
+                "text_html": user_comment.get_rendered_text(),
+            },
+        )
+
+
+class DeleteCommentView(RecipeFeedbackView):
+    model = Comment
+
+    def post(self, request: HttpRequest, pk: int) -> JsonResponse:
+        self.get_recipe(pk)
+        self.get_user_queryset(pk).delete()
+        return JsonResponse({"has_comment": False})
+
+
+__all__ = []
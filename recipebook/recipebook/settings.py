@@ -21,6 +21,13 @@ def load_int_from_env(key: str, default: int) -> int:
     return default
 
 
+def load_float_from_env(key: str, default: float) -> float:
+    try:
+        return float(os.environ.get(key, ""))
+    except ValueError:
+        return default
+
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 load_dotenv()
@@ -30,6 +37,17 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "not_secret_key")
 DEBUG = load_bool_from_env("DJANGO_DEBUG", False)
 DEFAULT_USER_IS_ACTIVE = load_bool_from_env("DEFAULT_USER_IS_ACTIVE", DEBUG)
 MAX_AUTH_ATTEMPTS = load_int_from_env("MAX_AUTH_ATTEMPTS", 5)
+THUMBNAIL_WORKERS = load_int_from_env("THUMBNAIL_WORKERS", 2)
+POPULARITY_PRIOR_WEIGHT = load_int_from_env("POPULARITY_PRIOR_WEIGHT", 5)
+POPULARITY_COOKED_WEIGHT = load_float_from_env(
+    "POPULARITY_COOKED_WEIGHT",
+    0.5,
+)
+THUMBNAIL_DETERMINISTIC_PATHS = load_bool_from_env(
+    "THUMBNAIL_DETERMINISTIC_PATHS",
+    False,
+)
+THUMBNAIL_PATHS_PREFIX = "thumbs/"
 
 DJANGO_ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "*")
 ALLOWED_HOSTS = list(map(str.strip, DJANGO_ALLOWED_HOSTS.split(",")))
@@ -160,6 +178,12 @@ DEFAULT_FROM_EMAIL = os.environ.get("DJANGO_MAIL", "webmaster@localhost")
 
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
+MEDIA_CONTENT_ADDRESSED = load_bool_from_env("MEDIA_CONTENT_ADDRESSED", False)
+IMAGE_UPLOAD_MAX_SIZE = load_int_from_env("IMAGE_UPLOAD_MAX_SIZE", 2048)
+IMAGE_UPLOAD_MAX_PIXELS = load_int_from_env(
+    "IMAGE_UPLOAD_MAX_PIXELS",
+    50_000_000,
+)
 
 UPLOADS_ROOT = BASE_DIR / "uploads"
 
@@ -7,12 +7,21 @@ from django.urls import include, path
 urlpatterns = [
     path("", include("recipes.urls")),
     path("users/", include("users.urls")),
+    path("feedback/", include("feedback.urls")),
     path("admin/", admin.site.urls),
     path("auth/", include("django.contrib.auth.urls")),
     path("i18n/", include("django.conf.urls.i18n")),
     path("mdeditor/", include("mdeditor.urls")),
 ]
 
+if settings.THUMBNAIL_DETERMINISTIC_PATHS:
+    urlpatterns.append(
+        path(
+            settings.MEDIA_URL.lstrip("/") + settings.THUMBNAIL_PATHS_PREFIX,
+            include("core.urls"),
+        ),
+    )
+
 if settings.MEDIA_URL:
     urlpatterns += static(
         settings.MEDIA_URL,
@@ -0,0 +1,103 @@
+from functools import cached_property
+import hashlib
+from typing import Any
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+from core.cache import get_generation, schedule_bump
+from core.pagination import CursorPage
+
+SEARCH_CACHE_TIMEOUT = 60 * 10
+
+
+class SearchCache:
+    generation_key = "recipes:search:generation"
+
+    def get_key(self, kind: str, canonical: str) -> str:
+        generation = get_generation(self.generation_key)
+        digest = hashlib.md5(canonical.encode()).hexdigest()
+        return f"recipes:search:{kind}:{generation}:{digest}"
+
+    def get_ids(self, canonical: str) -> list[int] | None:
+        return cache.get(self.get_key("ids", canonical))
+
+    def set_ids(self, canonical: str, ids: list[int]) -> None:
+        cache.set(self.get_key("ids", canonical), ids, SEARCH_CACHE_TIMEOUT)
+
+    def get_page_key(self, canonical: str, cursor: str | None) -> str:
+        return self.get_key("page", f"{canonical}#{cursor or ''}")
+
+    def get_page(self, key: str) -> CursorPage | None:
+        cached = cache.get(key)
+        if cached is None:
+            return None
+
+        return CursorPage(*cached)
+
+    def set_page(self, key: str, page: CursorPage) -> None:
+        cache.set(
+            key,
+            (list(page.object_list), page.next_cursor),
+            SEARCH_CACHE_TIMEOUT,
+        )
+
+    def get_count(self, canonical: str) -> int | None:
+        return cache.get(self.get_key("count", canonical))
+
+    def set_count(self, canonical: str, count: int) -> None:
+        cache.set(
+            self.get_key("count", canonical),
+            count,
+            SEARCH_CACHE_TIMEOUT,
+        )
+
+    def get_facets(self, canonical: str) -> dict[str, dict] | None:
+        return cache.get(self.get_key("facets", canonical))
+
+    def set_facets(self, canonical: str, facets: dict[str, dict]) -> None:
+        cache.set(
+            self.get_key("facets", canonical),
+            facets,
+            SEARCH_CACHE_TIMEOUT,
+        )
+
+    def invalidate(self) -> None:
+        schedule_bump(self.generation_key)
+
+
+search_cache = SearchCache()
+
+
+class SearchPaginator(Paginator):
+    def __init__(
+        self,
+        object_list: Any,
+        per_page: int,
+        canonical: str,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.canonical = canonical
+
+    @cached_property
+    def count(self) -> int:
+        count = search_cache.get_count(self.canonical)
+        if count is None:
+            count = Paginator.count.func(self)
+            search_cache.set_count(self.canonical, count)
+
+        return count
+
+    def page(self, number: Any) -> Page:
+        number = self.validate_number(number)
+        canonical = f"{self.canonical}#page={number}/{self.per_page}"
+        ids = search_cache.get_ids(canonical)
+        if ids is None:
+            ids = list(super().page(number).object_list)
+            search_cache.set_ids(canonical, ids)
+
+        return self._get_page(ids, number, self)
+
+
+__all__ = []
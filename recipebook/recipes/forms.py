@@ -2,9 +2,13 @@ from typing import Any
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.forms.renderers import TemplatesSetting
+from django.urls import reverse
 
 from core.forms import BaseForm
+from recipes.caches import search_cache
+from recipes.indexes import ingredient_index, ingredient_name_index
 from recipes.models import (
     Ingredient,
     IngredientUnit,
@@ -23,6 +27,7 @@ class IngredientsWidget(forms.Widget):
             css={
                 "all": ["css/ingredients_widget.css"],
             },
+            js=["js/ingredients_widget.js"],
         )
 
     def render(
@@ -76,8 +81,13 @@ class IngredientsWidget(forms.Widget):
         context["widget"]["id"] = id_
         context["widget"]["name"] = name
         context["widget"]["subwidgets"] = value
+        context["widget"]["rows_id"] = f"{id_}_rows"
         context["widget"]["unit_options"] = IngredientUnit.choices
-        context["widget"]["ingredients"] = Ingredient.objects.all()
+        digest, _ = ingredient_name_index.get_catalogue()
+        context["widget"]["catalogue_url"] = reverse(
+            "recipes:ingredient-catalogue",
+            args=[digest],
+        )
 
         return context
 
@@ -109,6 +119,7 @@ class IngredientsField(forms.Field):
         return prepared
 
     def clean(self, value: Any) -> Any:
+        ingredients = Ingredient.get_references().by_id
         cleaned = []
         for v in value:
             id_ = v["id"]
@@ -125,26 +136,29 @@ class IngredientsField(forms.Field):
                     code="invalid",
                 )
 
+            if int(ingredient) not in ingredients:
+                raise forms.ValidationError(
+                    forms.ModelChoiceField.default_error_messages[
+                        "invalid_choice"
+                    ],
+                    code="invalid_choice",
+                )
+
             try:
-                ingredient = Ingredient.objects.get(id=int(ingredient))
-                ri = RecipeIngredient()
-                ri.ingredient = ingredient
-                ri.count = count
-                ri.unit = unit
-                ri.clean_fields()
+                RecipeIngredient(count=count, unit=unit).clean_fields(
+                    exclude=[
+                        RecipeIngredient.recipe.field.name,
+                        RecipeIngredient.ingredient.field.name,
+                    ],
+                )
             except ValidationError as er:
-                er = dict(er)
-                del er[RecipeIngredient.recipe.field.name]
-                if er != {}:
-                    raise forms.ValidationError(str(er))
-            except Ingredient.DoesNotExist as er:
-                raise forms.ValidationError(str(er))
+                raise forms.ValidationError(str(dict(er)))
 
             cleaned.append(
                 {
                     "new": new,
                     "id": id_,
-                    "ingredient": ingredient,
+                    "ingredient": int(ingredient),
                     "count": float(count),
                     "unit": unit,
                 },
@@ -175,94 +189,72 @@ class RecipeForm(forms.ModelForm, BaseForm):
         else:
             self.initial["ingredients"] = []
 
-    def save(self, author_id: int) -> Recipe:
+    def save(self, author_id: int | None = None) -> Recipe:
         instance: Recipe = super().save(False)
-        instance.author_id = author_id
-        instance.state = RecipeState.PUBLISHED
-        instance.save()
-        ingredients_quary = instance.ingredients.all()
-        ingredients_current = list(ingredients_quary)
-        ingredients_new = self.cleaned_data["ingredients"]
-        created_ingredients = []
-        deleted_ingredients = []
-        deleted_ingredients_ids = []
-        for ingredient in ingredients_current:
-            id_ = str(ingredient.id)
-            deleted = True
-            for ing in ingredients_new:
-                if ing["id"] == id_:
-                    deleted = False
-                    break
-
-            if deleted:
-                deleted_ingredients.append(ingredient.id)
-                deleted_ingredients_ids.append(ingredient.ingredient_id)
-
-        for ingredient_data in ingredients_new:
-            id_ = ingredient_data["id"]
-            ingredient = ingredient_data["ingredient"]
-            count = ingredient_data["count"]
-            unit = ingredient_data["unit"]
-
-            if id_.isdigit():
-                id_ = int(id_)
-                existing = None
-                ing_used = False
-                for ing in ingredients_current:
-                    if ing.id == id_:
-                        existing = ing
-                    elif ing.ingredient_id == ingredient.id:
-                        ing_used = True
-
-                if existing:
-                    if (
-                        ing_used
-                        and ingredient.id not in deleted_ingredients_ids
-                    ):
-                        deleted_ingredients.append(id_)
-                    else:
-                        existing.ingredient = ingredient
-                        existing.count = count
-                        existing.unit = unit
+        if author_id is not None:
+            instance.author_id = author_id
 
-                continue
+        instance.state = RecipeState.PUBLISHED
+        with transaction.atomic():
+            instance.save()
+            self.save_m2m()
+            self.save_ingredients(instance)
 
-            existing = False
-            for ing in ingredients_current:
-                if ing.ingredient_id == ingredient.id:
-                    existing = True
-                    break
+        search_cache.invalidate()
+        return instance
 
-            if existing and ingredient.id not in deleted_ingredients_ids:
+    def save_ingredients(self, instance: Recipe) -> None:
+        fields = [
+            RecipeIngredient.count.field.name,
+            RecipeIngredient.unit.field.name,
+        ]
+        current = {
+            row.pk: row
+            for row in instance.ingredients.all().only(
+                RecipeIngredient.recipe.field.name,
+                RecipeIngredient.ingredient.field.name,
+                *fields,
+            )
+        }
+        kept = {}
+        updated = []
+        created = []
+        for data in self.cleaned_data["ingredients"]:
+            ingredient_id = data["ingredient"]
+            if ingredient_id in kept:
                 continue
 
-            created_ingredients.append(
-                RecipeIngredient(
+            row = None
+            if not data["new"]:
+                row = current.get(int(data["id"]))
+                if row is None:
+                    continue
+
+            if row is None or row.ingredient_id != ingredient_id:
+                row = RecipeIngredient(
                     recipe=instance,
-                    ingredient=ingredient,
-                    count=count,
-                    unit=unit,
-                ),
-            )
+                    ingredient_id=ingredient_id,
+                )
+                created.append(row)
+            elif row.count != data["count"] or row.unit != data["unit"]:
+                updated.append(row)
 
-        if deleted_ingredients:
-            RecipeIngredient.objects.filter(
-                id__in=deleted_ingredients,
-            ).delete()
+            row.count = data["count"]
+            row.unit = data["unit"]
+            kept[ingredient_id] = row
 
-        RecipeIngredient.objects.bulk_update(
-            ingredients_quary,
-            fields=[
-                RecipeIngredient.ingredient.field.name,
-                RecipeIngredient.count.field.name,
-                RecipeIngredient.unit.field.name,
-            ],
-        )
+        deleted = current.keys() - {row.pk for row in kept.values()}
+        if deleted:
+            RecipeIngredient.objects.filter(pk__in=deleted).delete()
 
-        if created_ingredients:
-            RecipeIngredient.objects.bulk_create(created_ingredients)
+        if updated:
+            RecipeIngredient.objects.bulk_update(updated, fields=fields)
 
-        return instance
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+
+        if deleted or updated or created:
+            ingredient_index.schedule_refresh(instance.pk)
 
 
 __all__ = []
@@ -0,0 +1,254 @@
+from bisect import bisect_left
+from functools import partial
+import hashlib
+import json
+from threading import local, RLock
+from typing import Iterable
+
+from django.db import transaction
+
+from core.cache import bump_generation, get_generation
+from core.references import reference_cache
+from core.utils import normalize_name, SIMILAR_CHARS
+from recipes import models
+
+
+class IngredientIndex:
+    version_key = "recipes:ingredient_index:version"
+
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._version: int | None = None
+        self._by_ingredient: dict[int, set[int]] = {}
+        self._by_recipe: dict[int, frozenset[int]] = {}
+        self._scheduled = local()
+
+    def recipes_with_all(self, ingredient_ids: Iterable[int]) -> set[int]:
+        self._ensure_actual()
+        with self._lock:
+            postings = sorted(
+                (
+                    self._by_ingredient.get(id_, set())
+                    for id_ in ingredient_ids
+                ),
+                key=len,
+            )
+            if not postings:
+                return set()
+
+            found = set(postings[0])
+            for posting in postings[1:]:
+                found.intersection_update(posting)
+                if not found:
+                    break
+
+            return found
+
+    def recipes_with_any(self, ingredient_ids: Iterable[int]) -> set[int]:
+        self._ensure_actual()
+        with self._lock:
+            found = set()
+            for id_ in ingredient_ids:
+                found.update(self._by_ingredient.get(id_, ()))
+
+            return found
+
+    def rank_by_coverage(
+        self,
+        recipe_ids: list[int],
+        available_ids: Iterable[int],
+    ) -> list[int]:
+        available = frozenset(available_ids)
+        self._ensure_actual()
+        with self._lock:
+            by_recipe = self._by_recipe
+            snapshot = [
+                by_recipe.get(recipe_id, frozenset())
+                for recipe_id in recipe_ids
+            ]
+
+        coverage = {}
+        for recipe_id, ingredients in zip(recipe_ids, snapshot):
+            covered = len(ingredients & available)
+            missing = len(ingredients) - covered
+            coverage[recipe_id] = (
+                -covered / len(ingredients) if ingredients else 0,
+                missing,
+            )
+
+        return sorted(recipe_ids, key=coverage.__getitem__)
+
+    def schedule_refresh(self, recipe_id: int) -> None:
+        scheduled = self._get_scheduled()
+        token = object()
+        scheduled[recipe_id] = token
+        transaction.on_commit(
+            partial(self._refresh_scheduled, recipe_id, token),
+        )
+
+    def _get_scheduled(self) -> dict[int, object]:
+        if not hasattr(self._scheduled, "tokens"):
+            self._scheduled.tokens = {}
+
+        return self._scheduled.tokens
+
+    def _refresh_scheduled(self, recipe_id: int, token: object) -> None:
+        scheduled = self._get_scheduled()
+        if scheduled.get(recipe_id) is not token:
+            return
+
+        del scheduled[recipe_id]
+        self.refresh([recipe_id])
+
+    def refresh(self, recipe_ids: Iterable[int]) -> None:
+        recipe_ids = set(recipe_ids)
+        rows = models.RecipeIngredient.objects.filter(
+            **{
+                models.RecipeIngredient.recipe.field.attname
+                + "__in": (recipe_ids),
+            },
+        ).values_list(
+            models.RecipeIngredient.recipe.field.attname,
+            models.RecipeIngredient.ingredient.field.attname,
+        )
+        ingredients = {id_: set() for id_ in recipe_ids}
+        for recipe_id, ingredient_id in rows:
+            ingredients[recipe_id].add(ingredient_id)
+
+        with self._lock:
+            version = bump_generation(self.version_key)
+            if self._version is None or version != self._version + 1:
+                self._version = None
+                return
+
+            for recipe_id, ingredient_ids in ingredients.items():
+                self._set_recipe(recipe_id, frozenset(ingredient_ids))
+
+            self._version = version
+
+    def rebuild(self) -> None:
+        with self._lock:
+            version = get_generation(self.version_key)
+            rows = models.RecipeIngredient.objects.values_list(
+                models.RecipeIngredient.recipe.field.attname,
+                models.RecipeIngredient.ingredient.field.attname,
+            )
+            by_ingredient: dict[int, set[int]] = {}
+            by_recipe: dict[int, set[int]] = {}
+            for recipe_id, ingredient_id in rows.iterator():
+                by_ingredient.setdefault(ingredient_id, set()).add(recipe_id)
+                by_recipe.setdefault(recipe_id, set()).add(ingredient_id)
+
+            self._by_ingredient = by_ingredient
+            self._by_recipe = {
+                id_: frozenset(ids) for id_, ids in by_recipe.items()
+            }
+            self._version = version
+
+    def _ensure_actual(self) -> None:
+        version = get_generation(self.version_key)
+        with self._lock:
+            if self._version != version:
+                self.rebuild()
+
+    def _set_recipe(self, recipe_id: int, ingredients: frozenset[int]) -> None:
+        previous = self._by_recipe.pop(recipe_id, frozenset())
+        for ingredient_id in previous - ingredients:
+            posting = self._by_ingredient[ingredient_id]
+            posting.discard(recipe_id)
+            if not posting:
+                del self._by_ingredient[ingredient_id]
+
+        for ingredient_id in ingredients - previous:
+            self._by_ingredient.setdefault(ingredient_id, set()).add(
+                recipe_id,
+            )
+
+        if ingredients:
+            self._by_recipe[recipe_id] = ingredients
+
+
+class IngredientNameIndex:
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._version: int | None = None
+        self._names: dict[int, str] = {}
+        self._keys: list[tuple[str, int]] = []
+        self._suffixes: list[tuple[str, int]] = []
+        self._catalogue: tuple[str, bytes] | None = None
+
+    def search(self, query: str, limit: int) -> list[tuple[int, str]]:
+        query = normalize_name(query)
+        self._ensure_actual()
+        with self._lock:
+            found = {}
+            for entries in (self._keys, self._suffixes):
+                i = bisect_left(entries, (query,))
+                while i < len(entries) and len(found) < limit:
+                    key, id_ = entries[i]
+                    if not key.startswith(query):
+                        break
+
+                    found.setdefault(id_, self._names[id_])
+                    i += 1
+
+            return list(found.items())
+
+    def get_names(self, ids: Iterable[int]) -> list[tuple[int, str]]:
+        self._ensure_actual()
+        with self._lock:
+            return [
+                (id_, self._names[id_]) for id_ in ids if id_ in self._names
+            ]
+
+    def get_catalogue(self) -> tuple[str, bytes]:
+        self._ensure_actual()
+        with self._lock:
+            if self._catalogue is None:
+                ingredients = [
+                    [id_, self._names[id_], key] for key, id_ in self._keys
+                ]
+                data = json.dumps(
+                    {"similar": SIMILAR_CHARS, "ingredients": ingredients},
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ).encode()
+                digest = hashlib.sha256(data).hexdigest()[:16]
+                self._catalogue = (digest, data)
+
+            return self._catalogue
+
+    def rebuild(self) -> None:
+        with self._lock:
+            version = reference_cache.get_version(models.Ingredient)
+            references = reference_cache.get(models.Ingredient, version)
+            names = {}
+            keys = []
+            suffixes = []
+            for id_, name, normalized in references.rows:
+                names[id_] = name
+                keys.append((normalized, id_))
+                suffixes.extend(
+                    (normalized[i:], id_) for i in range(1, len(normalized))
+                )
+
+            keys.sort()
+            suffixes.sort()
+            self._names = names
+            self._keys = keys
+            self._suffixes = suffixes
+            self._catalogue = None
+            self._version = version
+
+    def _ensure_actual(self) -> None:
+        version = reference_cache.get_version(models.Ingredient)
+        with self._lock:
+            if self._version != version:
+                self.rebuild()
+
+
+ingredient_index = IngredientIndex()
+ingredient_name_index = IngredientNameIndex()
+
+
+__all__ = []
@@ -0,0 +1,39 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recompute stored recipe rating aggregates"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        ids = Recipe.objects.order_by("pk").values_list("pk", flat=True)
+        total = ids.count()
+        done = 0
+        last_pk = None
+        while True:
+            batch_ids = ids
+            if last_pk is not None:
+                batch_ids = ids.filter(pk__gt=last_pk)
+
+            batch = list(batch_ids[:batch_size])
+            if not batch:
+                break
+
+            Recipe.objects.reconcile_ratings(
+                Recipe.objects.filter(pk__gte=batch[0], pk__lte=batch[-1]),
+            )
+            done += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f"{done}/{total}")
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {done} recipes"))
+
+
+__all__ = []
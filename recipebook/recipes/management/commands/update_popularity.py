@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recompute recipe popularity scores"  # noqa: A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        done = 0
+        for count in Recipe.objects.update_popularity(options["batch_size"]):
+            done += count
+            self.stdout.write(f"{done} recipes updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {done} recipes"))
+
+
+__all__ = []
@@ -1,13 +1,38 @@
 from functools import cached_property
-from typing import TypedDict
+import math
+from typing import Iterator, TypedDict
 
-from django.db.models import Manager, Prefetch
+from django.conf import settings
+from django.db.models import (
+    Case,
+    Count,
+    Expression,
+    F,
+    FloatField,
+    Manager,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThan
 from django.db.models.query import QuerySet
+from django.utils.http import urlencode
 
+from core.indexes import name_index
+from core.pagination import CursorPage, CursorPaginator
+from core.thumbnails import prefetch_thumbnails
 from core.utils import normalize_name
 from recipes import models
+from recipes.caches import search_cache
+from recipes.indexes import ingredient_index
 from users.models import User
 
+SQL_IDS_LIMIT = 512
+
 
 class SearchParams(TypedDict, total=False):
     sn: str  # name
@@ -16,20 +41,179 @@ class SearchParams(TypedDict, total=False):
     sie: str  # exclude ingredients
     sk: str  # kitchen
     sl: str  # level
+    sh: str  # available ingredients
     order: str
 
 
+def parse_ids(value: str) -> list[int]:
+    return [int(v) for v in value.split("-") if v.isdigit()]
+
+
+def get_rating_expression(
+    rating_sum: Expression,
+    rating_count: Expression,
+) -> Expression:
+    return Case(
+        When(
+            GreaterThan(rating_count, 0),
+            then=Cast(rating_sum, FloatField()) / rating_count,
+        ),
+        default=Value(0.0),
+    )
+
+
 class RecipeManager(Manager["models.Recipe"]):
+    @cached_property
+    def rating_fields(self) -> tuple[str, str, str]:
+        return (
+            models.Recipe.rating_sum.field.name,
+            models.Recipe.rating_count.field.name,
+            models.Recipe.rating.field.name,
+        )
+
+    @cached_property
+    def computed_fields(self) -> tuple[str, ...]:
+        return (*self.rating_fields, models.Recipe.popularity.field.name)
+
     @cached_property
     def ordering(self) -> dict[str, list[str]]:
         field_name = models.Recipe.name.field.name
         return {
-            "new": ["-" + models.Recipe.created.field.name, field_name],
-            "easy": [models.Recipe.level.field.name, field_name],
-            "fast": [models.Recipe.time.field.name, field_name],
-            "name": [field_name],
+            "rating": [
+                "-" + models.Recipe.rating.field.name,
+                "-" + models.Recipe.rating_count.field.name,
+                field_name,
+                "pk",
+            ],
+            "new": ["-" + models.Recipe.created.field.name, field_name, "pk"],
+            "easy": [models.Recipe.level.field.name, field_name, "pk"],
+            "fast": [models.Recipe.time.field.name, field_name, "pk"],
+            "name": [field_name, "pk"],
         }
 
+    def canonicalize(self, params: SearchParams) -> str:
+        canonical = {"sn": normalize_name(params.get("sn", ""))}
+        for key in ("si", "sie", "sh"):
+            ids = sorted(set(parse_ids(params.get(key, ""))))
+            canonical[key] = "-".join(map(str, ids))
+
+        for key in ("sc", "sk", "sl"):
+            value = params.get(key, "")
+            if value.isdigit():
+                canonical[key] = str(int(value))
+
+        order = params.get("order", "name")
+        canonical["order"] = order if order in self.ordering else "name"
+        return urlencode(sorted(canonical.items()))
+
+    def get_ordering(self, params: SearchParams) -> list[str]:
+        order_key = params.get("order", "name")
+        return self.ordering.get(order_key, self.ordering["name"])
+
+    def update_rating(
+        self,
+        recipe_id: int,
+        sum_delta: int,
+        count_delta: int,
+    ) -> None:
+        sum_name, count_name, rating_name = self.rating_fields
+        rating_sum = F(sum_name) + sum_delta
+        rating_count = F(count_name) + count_delta
+        self.filter(pk=recipe_id).update(
+            **{
+                sum_name: rating_sum,
+                count_name: rating_count,
+                rating_name: get_rating_expression(rating_sum, rating_count),
+            },
+        )
+        search_cache.invalidate()
+
+    def reconcile_ratings(self, queryset: QuerySet) -> int:
+        rate_model = models.Recipe.ratings.rel.related_model
+        sum_name, count_name, rating_name = self.rating_fields
+        ratings = (
+            rate_model.objects.filter(
+                **{rate_model.recipe.field.name: OuterRef("pk")},
+            )
+            .order_by()
+            .values(rate_model.recipe.field.name)
+        )
+        value_sum = Sum(rate_model.value.field.name)
+        rating_sum = Coalesce(
+            Subquery(ratings.annotate(total=value_sum).values("total")),
+            0,
+        )
+        rating_count = Coalesce(
+            Subquery(ratings.annotate(total=Count("pk")).values("total")),
+            0,
+        )
+        search_cache.invalidate()
+        return queryset.update(
+            **{
+                sum_name: rating_sum,
+                count_name: rating_count,
+                rating_name: get_rating_expression(rating_sum, rating_count),
+            },
+        )
+
+    def update_popularity(self, batch_size: int) -> Iterator[int]:
+        sum_name, count_name, _ = self.rating_fields
+        totals = self.aggregate(
+            rating_sum=Sum(sum_name),
+            rating_count=Sum(count_name),
+        )
+        mean = 0
+        if totals["rating_count"]:
+            mean = totals["rating_sum"] / totals["rating_count"]
+
+        prior = settings.POPULARITY_PRIOR_WEIGHT
+        cooked_weight = settings.POPULARITY_COOKED_WEIGHT
+        cooked = models.Recipe.cooked.field.related_query_name()
+        rows = self.annotate(cooked_count=Count(cooked)).order_by("pk")
+        rows = rows.values_list("pk", sum_name, count_name, "cooked_count")
+        last_pk = None
+        while True:
+            batch_rows = rows
+            if last_pk is not None:
+                batch_rows = rows.filter(pk__gt=last_pk)
+
+            batch = list(batch_rows[:batch_size])
+            if not batch:
+                break
+
+            recipes = [
+                self.model(
+                    pk=pk,
+                    popularity=(prior * mean + rating_sum)
+                    / (prior + rating_count)
+                    + cooked_weight * math.log1p(cooked_count),
+                )
+                for pk, rating_sum, rating_count, cooked_count in batch
+            ]
+            self.bulk_update(recipes, [models.Recipe.popularity.field.name])
+            last_pk = batch[-1][0]
+            search_cache.invalidate()
+            yield len(batch)
+
+    def popular(self) -> QuerySet:
+        return self.published().order_by(
+            "-" + models.Recipe.popularity.field.name,
+            "pk",
+        )
+
+    def newest(self) -> QuerySet:
+        return self.published().order_by(
+            "-" + models.Recipe.created.field.name,
+            "pk",
+        )
+
+    def optimize_for_cards(self, queryset: QuerySet) -> QuerySet:
+        return queryset.select_related(models.Recipe.author.field.name).only(
+            models.Recipe.name.field.name,
+            models.Recipe.author.field.name + "__" + User.username.field.name,
+            models.Recipe.main_image.field.name,
+        )
+
     def published(self) -> QuerySet:
         return self.get_queryset().filter(
             **{
@@ -37,39 +221,27 @@ class RecipeManager(Manager["models.Recipe"]):
             },
         )
 
-    def search(self, params: SearchParams) -> QuerySet:
-        queryset = self.published()
-        filter_fields = {}
-        exclude_fields = {}
-
-        name = params.get("sn", "")
-        if name:
-            name = normalize_name(name)
+    def filter_search(self, params: SearchParams) -> QuerySet:
+        queryset = self.filter_dimensions(self.published(), params)
+        name = normalize_name(params.get("sn", ""))
+        if name and not name_index.can_search(name):
             field = models.Recipe.normalized_name.field.name + "__contains"
-            filter_fields[field] = name
+            queryset = queryset.filter(**{field: name})
+
+        return queryset.order_by(*self.get_ordering(params))
+
+    def filter_dimensions(
+        self,
+        queryset: QuerySet,
+        params: SearchParams,
+    ) -> QuerySet:
+        filter_fields = {}
 
         category = params.get("sc", "")
         if category.isdigit():
             field = models.Recipe.categories.field.name + "__in"
             filter_fields[field] = [category]
 
-        field_ings = models.Recipe.ingredients.field.related_query_name()
-        field_ing = models.RecipeIngredient.ingredient.field.name
-        field = field_ings + "__" + field_ing + "__in"
-        ingredients = params.get("si", "")
-        if ingredients:
-            ingredients = [
-                int(v) for v in ingredients.split("-") if v.isdigit()
-            ]
-            filter_fields[field] = ingredients
-
-        ingredients_exclude = params.get("sie", "")
-        if ingredients_exclude:
-            ingredients = [
-                int(v) for v in ingredients_exclude.split("-") if v.isdigit()
-            ]
-            exclude_fields[field] = ingredients
-
         kitchen = params.get("sk", "")
         if kitchen.isdigit():
             field = models.Recipe.kitchen.field.name
@@ -80,16 +252,168 @@ class RecipeManager(Manager["models.Recipe"]):
             field = models.Recipe.level.field.name
             filter_fields[field] = level
 
-        if filter_fields:
-            queryset = queryset.filter(**filter_fields)
+        if not filter_fields:
+            return queryset
 
-        if exclude_fields:
-            queryset = queryset.exclude(**exclude_fields)
+        return queryset.filter(**filter_fields)
 
-        order_key = params.get("order", "name")
-        order = self.ordering.get(order_key, self.ordering["name"])
+    def search_sets(
+        self,
+        params: SearchParams,
+    ) -> tuple[set[int] | None, set[int]]:
+        allowed = None
+        name = normalize_name(params.get("sn", ""))
+        if name and name_index.can_search(name):
+            allowed = name_index.search(self.model, name)
+
+        ingredients = parse_ids(params.get("si", ""))
+        if ingredients and (allowed is None or allowed):
+            found = ingredient_index.recipes_with_all(ingredients)
+            allowed = found if allowed is None else allowed & found
+
+        available = parse_ids(params.get("sh", ""))
+        if available and (allowed is None or allowed):
+            found = ingredient_index.recipes_with_any(available)
+            allowed = found if allowed is None else allowed & found
+
+        excluded = set()
+        ingredients_exclude = parse_ids(params.get("sie", ""))
+        if ingredients_exclude:
+            excluded = ingredient_index.recipes_with_any(ingredients_exclude)
+
+        return allowed, excluded
+
+    def filter_search_sets(
+        self,
+        queryset: QuerySet,
+        params: SearchParams,
+    ) -> QuerySet:
+        name = normalize_name(params.get("sn", ""))
+        if name and name_index.can_search(name):
+            queryset = queryset.filter(
+                pk__in=name_index.get_subquery(self.model, name),
+            )
+
+        recipe_field = models.RecipeIngredient.recipe.field.attname
+        ingredient_field = models.RecipeIngredient.ingredient.field.attname
+        recipe_ingredients = models.RecipeIngredient.objects.order_by()
+
+        ingredients = set(parse_ids(params.get("si", "")))
+        if ingredients:
+            with_all = recipe_ingredients.filter(
+                **{ingredient_field + "__in": ingredients},
+            )
+            with_all = with_all.values(recipe_field).annotate(
+                found=Count(ingredient_field),
+            )
+            queryset = queryset.filter(
+                pk__in=with_all.filter(found=len(ingredients)).values(
+                    recipe_field,
+                ),
+            )
+
+        for key, exclude in (("sh", False), ("sie", True)):
+            ids = parse_ids(params.get(key, ""))
+            if not ids:
+                continue
+
+            with_any = recipe_ingredients.filter(
+                **{ingredient_field + "__in": ids},
+            ).values(recipe_field)
+            if exclude:
+                queryset = queryset.exclude(pk__in=with_any)
+            else:
+                queryset = queryset.filter(pk__in=with_any)
+
+        return queryset
+
+    def narrow_search(self, params: SearchParams) -> QuerySet:
+        queryset = self.filter_search(params)
+        allowed, excluded = self.search_sets(params)
 
-        return queryset.order_by(*order)
+        if allowed is not None:
+            allowed -= excluded
+            if len(allowed) <= SQL_IDS_LIMIT:
+                return queryset.filter(pk__in=allowed)
+        elif len(excluded) <= SQL_IDS_LIMIT:
+            return queryset.exclude(pk__in=excluded) if excluded else queryset
+
+        return self.filter_search_sets(queryset, params)
+
+    def search(self, params: SearchParams) -> QuerySet | list[int]:
+        queryset = self.narrow_search(params).values_list("pk", flat=True)
+        available = parse_ids(params.get("sh", ""))
+        if not available:
+            return queryset
+
+        canonical = self.canonicalize(params)
+        ids = search_cache.get_ids(canonical)
+        if ids is None:
+            ids = ingredient_index.rank_by_coverage(list(queryset), available)
+            search_cache.set_ids(canonical, ids)
+
+        return ids
+
+    def facets(self, params: SearchParams) -> dict[str, dict[int, int]]:
+        canonical = self.canonicalize(params)
+        facets = search_cache.get_facets(canonical)
+        if facets is not None:
+            return facets
+
+        facets = {}
+        dimensions = {
+            "sc": models.Recipe.categories.field.name,
+            "sk": models.Recipe.kitchen.field.name,
+            "sl": models.Recipe.level.field.name,
+        }
+        base = {k: v for k, v in params.items() if k not in dimensions}
+        narrowed = self.narrow_search(base).order_by()
+        for key, field in dimensions.items():
+            others = {k: params.get(k, "") for k in dimensions if k != key}
+            queryset = self.filter_dimensions(narrowed, others)
+            rows = queryset.values_list(field).annotate(count=Count("pk"))
+            facets[field] = {
+                value: count for value, count in rows if value is not None
+            }
+
+        search_cache.set_facets(canonical, facets)
+        return facets
+
+    def search_after(
+        self,
+        params: SearchParams,
+        cursor: str | None,
+        per_page: int,
+    ) -> CursorPage:
+        ordering = self.get_ordering(params)
+        if params.get("sh"):
+            paginator = CursorPaginator(self.published(), ordering, per_page)
+            page = paginator.get_page_from_ids(self.search(params), cursor)
+            if page is not None:
+                return page
+
+        key = search_cache.get_page_key(self.canonicalize(params), cursor)
+        page = search_cache.get_page(key)
+        if page is None:
+            queryset = self.narrow_search(params)
+            paginator = CursorPaginator(queryset, ordering, per_page)
+            page = paginator.get_page(cursor)
+            search_cache.set_page(key, page)
+
+        return page
+
+    def get_search_page(self, ids: list[int]) -> list["models.Recipe"]:
+        queryset = self.optimize_for_search_page(self.filter(pk__in=ids))
+        recipes = {recipe.pk: recipe for recipe in queryset}
+        recipes = [recipes[id_] for id_ in ids if id_ in recipes]
+        main_image = models.Recipe.main_image.field.name
+        prefetch_thumbnails(
+            recipes,
+            main_image,
+            "128x128",
+            *models.Recipe.get_thumbnail_variants(main_image, "128x128"),
+        )
+        return recipes
 
     def optimize_for_search_page(self, queryset: QuerySet) -> QuerySet:
         queryset = queryset.select_related(
@@ -168,6 +492,32 @@ class RecipeManager(Manager["models.Recipe"]):
             models.Recipe.level.field.name,
             models.Recipe.time.field.name,
             models.Recipe.instruction.field.name,
+            models.Recipe.instruction_html.field.name,
+            models.Recipe.rating_count.field.name,
+            models.Recipe.rating.field.name,
+        )
+
+    def with_user_feedback(self, queryset: QuerySet, user: User) -> QuerySet:
+        rate_model = models.Recipe.ratings.rel.related_model
+        cooked_model = models.Recipe.cooked.rel.related_model
+        ratings = rate_model.objects.filter(
+            **{
+                rate_model.author.field.name: user,
+                rate_model.recipe.field.name: OuterRef("pk"),
+            },
+        )
+        cooked = cooked_model.objects.filter(
+            **{
+                cooked_model.author.field.name: user,
+                cooked_model.recipe.field.name: OuterRef("pk"),
+            },
+        )
+        return queryset.annotate(
+            user_rating_id=Subquery(ratings.values("pk")[:1]),
+            user_rating_value=Subquery(
+                ratings.values(rate_model.value.field.name)[:1],
+            ),
+            user_cooked_id=Subquery(cooked.values("pk")[:1]),
         )
 
 
@@ -0,0 +1,13 @@
+import core.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipeimage_alter_category_options_and_more"),
+    ]
+
+    operations = [
+        core.indexes.CreateNameIndex("recipe"),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:01
+
+import core.images
+import core.storage
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_alter_recipe_main_image_alter_recipeimage_image"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="main_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=core.storage.get_media_storage,
+                upload_to=core.utils.RandomFileName("recipes/main_image/"),
+                validators=[core.images.validate_image_upload],
+                verbose_name="recipes__model__recipe__main_image",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeimage",
+            name="image",
+            field=models.ImageField(
+                storage=core.storage.get_media_storage,
+                upload_to=core.utils.RandomFileName("recipes/recipe/"),
+                validators=[core.images.validate_image_upload],
+                verbose_name="recipes__model__recipe_image__image",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Rate = apps.get_model("feedback", "Rate")
+    ratings = Rate.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+    for recipe in Recipe.objects.annotate(
+        total=Coalesce(Subquery(ratings.annotate(s=Sum("value")).values("s")), 0),
+        count=Coalesce(Subquery(ratings.annotate(c=Count("pk")).values("c")), 0),
+    ).filter(count__gt=0):
+        Recipe.objects.filter(pk=recipe.pk).update(
+            rating_sum=recipe.total,
+            rating_count=recipe.count,
+            rating=recipe.total / recipe.count,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_alter_recipe_main_image_alter_recipeimage_image"),
+        ("feedback", "0002_cooked"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="rating",
+            field=models.FloatField(
+                db_index=True,
+                default=0,
+                editable=False,
+                verbose_name="recipes__model__recipe__rating",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="recipes__model__recipe__rating_count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_sum",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="recipes__model__recipe__rating_sum",
+            ),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
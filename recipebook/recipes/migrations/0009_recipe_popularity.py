@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_recipe_rating"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="popularity",
+            field=models.FloatField(
+                default=0,
+                editable=False,
+                verbose_name="recipes__model__recipe__popularity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["state", "-popularity"],
+                name="recipes_recipe_popular_idx",
+            ),
+        ),
+    ]
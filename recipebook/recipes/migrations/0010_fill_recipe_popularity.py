@@ -0,0 +1,41 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:40
+
+import math
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def fill_popularity(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    totals = Recipe.objects.aggregate(
+        rating_sum=Sum("rating_sum"),
+        rating_count=Sum("rating_count"),
+    )
+    mean = 0
+    if totals["rating_count"]:
+        mean = totals["rating_sum"] / totals["rating_count"]
+
+    prior = settings.POPULARITY_PRIOR_WEIGHT
+    cooked_weight = settings.POPULARITY_COOKED_WEIGHT
+    recipes = []
+    for recipe in Recipe.objects.annotate(cooked_count=Count("cooked")):
+        recipe.popularity = (prior * mean + recipe.rating_sum) / (
+            prior + recipe.rating_count
+        ) + cooked_weight * math.log1p(recipe.cooked_count)
+        recipes.append(recipe)
+
+    Recipe.objects.bulk_update(recipes, ["popularity"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_recipe_popularity"),
+        ("feedback", "0004_comment_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,24 @@
+from typing import Any
+
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.dispatch import receiver
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from mdeditor.fields import MDTextField
-from sorl.thumbnail import get_thumbnail
-
 
-from core.models import NormalizedNameMixin, UniqueNormalizedNameMixin
+from core.images import validate_image_upload
+from core.models import (
+    NormalizedNameMixin,
+    RenderedMarkdownMixin,
+    ThumbnailsMixin,
+    UniqueNormalizedNameMixin,
+)
+from core.storage import get_media_storage
+from core.thumbnails import get_variant_specs
 from core.utils import RandomFileName, render_markdown, Thumbnail
+from recipes.caches import search_cache
+from recipes.indexes import ingredient_index
 from recipes.managers import RecipeManager
 from users.models import User
 
@@ -86,8 +97,27 @@ class Ingredient(UniqueNormalizedNameMixin, models.Model):
         return self.name
 
 
-class Recipe(NormalizedNameMixin, models.Model):
+class Recipe(
+    NormalizedNameMixin,
+    RenderedMarkdownMixin,
+    ThumbnailsMixin,
+    models.Model,
+):
     objects: RecipeManager = RecipeManager()
+    rendered_fields = {"instruction": "instruction_html"}
+    thumbnails = {
+        "main_image": {
+            "500": {"quality": 85},
+            "128x128": {"crop": "center", "quality": 51},
+            **get_variant_specs("500", [160, 320, 500], quality=80),
+            **get_variant_specs(
+                "128x128",
+                [128, 256],
+                crop="center",
+                quality=70,
+            ),
+        },
+    }
 
     name = models.CharField(
         verbose_name=_("recipes__model__recipe__name"),
@@ -131,9 +161,16 @@ class Recipe(NormalizedNameMixin, models.Model):
         verbose_name=_("recipes__model__recipe__instruction"),
         max_length=8191,
     )
+    instruction_html = models.TextField(
+        editable=False,
+        blank=True,
+        default="",
+    )
     main_image = models.ImageField(
         verbose_name=_("recipes__model__recipe__main_image"),
         upload_to=RandomFileName("recipes/main_image/"),
+        storage=get_media_storage,
+        validators=[validate_image_upload],
         blank=True,
         null=True,
     )
@@ -144,10 +181,37 @@ class Recipe(NormalizedNameMixin, models.Model):
     time = models.PositiveIntegerField(
         verbose_name=_("recipes__model__recipe__time"),
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name=_("recipes__model__recipe__rating_sum"),
+        editable=False,
+        default=0,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name=_("recipes__model__recipe__rating_count"),
+        editable=False,
+        default=0,
+    )
+    rating = models.FloatField(
+        verbose_name=_("recipes__model__recipe__rating"),
+        editable=False,
+        default=0,
+        db_index=True,
+    )
+    popularity = models.FloatField(
+        verbose_name=_("recipes__model__recipe__popularity"),
+        editable=False,
+        default=0,
+    )
 
     class Meta:
         verbose_name = _("recipes__model__recipe__verbose_name")
         verbose_name_plural = _("recipes__model__recipe__verbose_name_plural")
+        indexes = [
+            models.Index(
+                fields=["state", "-popularity"],
+                name="recipes_recipe_popular_idx",
+            ),
+        ]
 
     def __str__(self):
         if len(self.name) > 100:
@@ -155,24 +219,32 @@ class Recipe(NormalizedNameMixin, models.Model):
 
         return self.name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.__class__.objects.computed_fields
+            ]
+
+        super().save(*args, **kwargs)
+
     def get_rendered_instruction(self) -> str:
+        if self.instruction_html or not self.instruction:
+            return self.instruction_html
+
         return render_markdown(self.instruction)
 
     def get_image_500(self) -> Thumbnail | None:
-        if not self.main_image:
-            return None
-
-        return get_thumbnail(self.main_image, "500", quality=85)
+        return self.get_thumbnail(self.__class__.main_image.field.name, "500")
 
     def get_image_128x128(self) -> Thumbnail | None:
-        if not self.main_image:
-            return None
-
-        return get_thumbnail(
-            self.main_image,
+        return self.get_thumbnail(
+            self.__class__.main_image.field.name,
             "128x128",
-            crop="center",
-            quality=51,
         )
 
     def image_tmb(self) -> str:
@@ -226,7 +298,21 @@ class RecipeIngredient(models.Model):
         }
 
 
-class RecipeImage(models.Model):
+class RecipeImage(ThumbnailsMixin, models.Model):
+    thumbnails = {
+        "image": {
+            "500": {"quality": 85},
+            "128x128": {"crop": "center", "quality": 51},
+            **get_variant_specs("500", [160, 320, 500], quality=80),
+            **get_variant_specs(
+                "128x128",
+                [128, 256],
+                crop="center",
+                quality=70,
+            ),
+        },
+    }
+
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
@@ -235,6 +321,8 @@ class RecipeImage(models.Model):
     )
     image = models.ImageField(
         upload_to=RandomFileName("recipes/recipe/"),
+        storage=get_media_storage,
+        validators=[validate_image_upload],
         verbose_name=_("recipes__model__recipe_image__image"),
     )
 
@@ -251,16 +339,10 @@ class RecipeImage(models.Model):
         }
 
     def get_image_500(self) -> Thumbnail | None:
-        if not self.image:
-            return None
-
-        return get_thumbnail(self.image, "500", quality=85)
+        return self.get_thumbnail(self.__class__.image.field.name, "500")
 
     def get_image_128x128(self) -> Thumbnail | None:
-        if not self.image:
-            return None
-
-        return get_thumbnail(self.image, "128x128", crop="center", quality=51)
+        return self.get_thumbnail(self.__class__.image.field.name, "128x128")
 
     def image_tmb(self) -> str:
         if not self.image:
@@ -274,4 +356,33 @@ class RecipeImage(models.Model):
     image_tmb.allow_tags = True
 
 
+@receiver(models.signals.post_save, sender=RecipeIngredient)
+@receiver(models.signals.post_delete, sender=RecipeIngredient)
+def update_ingredient_index(
+    sender: type[RecipeIngredient],
+    instance: RecipeIngredient,
+    **kwargs: Any,
+) -> None:
+    ingredient_index.schedule_refresh(instance.recipe_id)
+    search_cache.invalidate()
+
+
+@receiver(models.signals.post_save, sender=Recipe)
+@receiver(models.signals.post_delete, sender=Recipe)
+@receiver(models.signals.post_delete, sender=Category)
+@receiver(models.signals.post_delete, sender=Kitchen)
+def invalidate_search_cache(sender: Any, **kwargs: Any) -> None:
+    search_cache.invalidate()
+
+
+@receiver(models.signals.m2m_changed, sender=Recipe.categories.through)
+def invalidate_search_categories(
+    sender: Any,
+    action: str,
+    **kwargs: Any,
+) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_cache.invalidate()
+
+
 __all__ = []
@@ -0,0 +1,674 @@
+from io import BytesIO, StringIO
+import tempfile
+from unittest import mock
+
+from django import forms
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.test import override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from core.cache import bump_generation
+from core.management.commands import dedup_media
+from core.references import reference_cache, ReferenceCache
+from core.storage import ContentAddressedStorage
+from core.thumbnails import get_path_thumbnail
+from recipes import managers
+from recipes.caches import search_cache, SearchPaginator
+from recipes.forms import IngredientsField, RecipeForm
+from recipes.indexes import (
+    ingredient_index,
+    ingredient_name_index,
+    IngredientIndex,
+)
+from recipes.models import (
+    Category,
+    Ingredient,
+    IngredientUnit,
+    Recipe,
+    RecipeIngredient,
+    RecipeLevel,
+    RecipeState,
+)
+from users.models import User
+
+
+class RecipeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(
+            "author",
+            "author@example.com",
+            "password",
+        )
+        cls.salt = Ingredient.objects.create(name="Соль")
+        cls.sugar = Ingredient.objects.create(name="Сахар")
+        cls.flour = Ingredient.objects.create(name="Мука")
+        cls.bread = cls.create_recipe("Хлеб", [cls.salt, cls.flour])
+        cls.cake = cls.create_recipe("Торт", [cls.sugar, cls.flour])
+        cls.soup = cls.create_recipe("Суп", [cls.salt])
+
+    @classmethod
+    def create_recipe(
+        cls,
+        name: str,
+        ingredients: list[Ingredient],
+        state: str = RecipeState.PUBLISHED,
+    ) -> Recipe:
+        recipe = Recipe.objects.create(
+            name=name,
+            author=cls.user,
+            state=state,
+            instruction="Приготовить",
+            level=RecipeLevel.EASY,
+            time=10,
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredient,
+                count=1,
+                unit=IngredientUnit.PIECE,
+            )
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def setUp(self) -> None:
+        cache.clear()
+        reference_cache._data.clear()
+        ingredient_index._version = None
+        ingredient_name_index._version = None
+
+
+class IngredientIndexTests(RecipeTestCase):
+    def test_other_worker_sees_refresh(self) -> None:
+        worker = IngredientIndex()
+        other = IngredientIndex()
+        self.assertEqual(
+            worker.recipes_with_all([self.sugar.pk]),
+            {self.cake.pk},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.create(
+                recipe=self.bread,
+                ingredient=self.sugar,
+                count=1,
+                unit=IngredientUnit.PIECE,
+            )
+            other.schedule_refresh(self.bread.pk)
+
+        self.assertEqual(
+            worker.recipes_with_all([self.sugar.pk]),
+            {self.bread.pk, self.cake.pk},
+        )
+
+
+class SearchTests(RecipeTestCase):
+    def get_found(self, params: managers.SearchParams) -> set[int]:
+        queryset = Recipe.objects.narrow_search(params)
+        return set(queryset.values_list("pk", flat=True))
+
+    def assert_search(
+        self,
+        params: managers.SearchParams,
+        expected: list[Recipe],
+    ) -> None:
+        expected = {recipe.pk for recipe in expected}
+        self.assertEqual(self.get_found(params), expected)
+        with mock.patch.object(managers, "SQL_IDS_LIMIT", -1):
+            self.assertEqual(self.get_found(params), expected)
+
+    def test_unfiltered_search_stays_in_sql(self) -> None:
+        self.assertIsInstance(Recipe.objects.search({}), QuerySet)
+
+    def test_ingredient_filters(self) -> None:
+        self.assert_search({}, [self.bread, self.cake, self.soup])
+        self.assert_search({"si": f"{self.salt.pk}"}, [self.bread, self.soup])
+        self.assert_search(
+            {"si": f"{self.salt.pk}-{self.flour.pk}"},
+            [self.bread],
+        )
+        self.assert_search({"sh": f"{self.sugar.pk}"}, [self.cake])
+        self.assert_search({"sie": f"{self.flour.pk}"}, [self.soup])
+        self.assert_search({"sn": "хле"}, [self.bread])
+
+    def test_search_pages_follow_cursor(self) -> None:
+        params = {"order": "name"}
+        cursor = None
+        found = []
+        while True:
+            page = Recipe.objects.search_after(params, cursor, 2)
+            found.extend(page.object_list)
+            if not page.has_next():
+                break
+
+            cursor = page.next_cursor
+
+        expected = [self.soup.pk, self.cake.pk, self.bread.pk]
+        self.assertEqual(found, expected)
+
+    def test_search_page_is_cached_until_recipe_changes(self) -> None:
+        with self.assertNumQueries(2):
+            page = Recipe.objects.search_after({}, None, 2)
+
+        with self.assertNumQueries(1):
+            cached = Recipe.objects.search_after({}, None, 2)
+
+        self.assertEqual(cached.object_list, page.object_list)
+        self.assertEqual(cached.next_cursor, page.next_cursor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bread.delete()
+
+        page = Recipe.objects.search_after({}, None, 2)
+        self.assertNotIn(self.bread.pk, page.object_list)
+
+    def test_search_request_reads_each_generation_once(self) -> None:
+        params = {"si": f"{self.salt.pk}", "sh": f"{self.salt.pk}"}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("recipes:search"), params)
+
+        self.assertEqual(response.status_code, 200)
+        reads = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "core_generation" in query["sql"]
+        ]
+        self.assertTrue(reads)
+        self.assertEqual(len(reads), len(set(reads)))
+
+    def test_offset_page_is_cached(self) -> None:
+        canonical = Recipe.objects.canonicalize({})
+        pages = []
+        for queries in (6, 2):
+            queryset = Recipe.objects.search({})
+            paginator = SearchPaginator(queryset, 2, canonical)
+            with self.assertNumQueries(queries):
+                page = paginator.page(2)
+                pages.append((paginator.count, list(page.object_list)))
+
+        self.assertEqual(pages[0], pages[1])
+        self.assertEqual(pages[0], (3, [self.bread.pk]))
+
+    def test_rating_change_invalidates_cached_pages(self) -> None:
+        params = {"order": "rating"}
+        page = Recipe.objects.search_after(params, None, 3)
+        self.assertEqual(page.object_list[0], self.soup.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.update_rating(self.bread.pk, 5, 1)
+
+        page = Recipe.objects.search_after(params, None, 3)
+        self.assertEqual(page.object_list[0], self.bread.pk)
+
+    def test_category_change_invalidates_once(self) -> None:
+        category = Category.objects.create(name="Супы")
+        with mock.patch.object(search_cache, "invalidate") as invalidate:
+            self.soup.categories.add(category)
+            invalidate.assert_called_once()
+            invalidate.reset_mock()
+            self.soup.categories.clear()
+            invalidate.assert_called_once()
+
+    def test_facets_narrow_ingredients_once(self) -> None:
+        params = {"si": f"{self.salt.pk}", "sl": f"{RecipeLevel.HARD}"}
+        with mock.patch.object(
+            ingredient_index,
+            "recipes_with_all",
+            wraps=ingredient_index.recipes_with_all,
+        ) as recipes_with_all:
+            facets = Recipe.objects.facets(params)
+
+        recipes_with_all.assert_called_once()
+        level = Recipe.level.field.name
+        self.assertEqual(facets[level], {RecipeLevel.EASY: 2})
+        self.assertEqual(facets[Recipe.kitchen.field.name], {})
+
+
+class ReferenceCacheTests(RecipeTestCase):
+    def clean_ingredient(self, ingredient_id: int) -> list[dict]:
+        return IngredientsField().clean(
+            [
+                {
+                    "id": "x1",
+                    "ingredient": str(ingredient_id),
+                    "count": "1",
+                    "unit": IngredientUnit.PIECE,
+                },
+            ],
+        )
+
+    def test_warm_cache_only_checks_generation(self) -> None:
+        references = ReferenceCache()
+        references.get(Ingredient)
+        with self.assertNumQueries(1):
+            data = references.get(Ingredient)
+
+        self.assertIn(self.salt.pk, data.by_id)
+
+    def test_save_bumps_version_once(self) -> None:
+        version = reference_cache.get_version(Ingredient)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.name = "Морская соль"
+            self.salt.save()
+
+        self.assertEqual(reference_cache.get_version(Ingredient), version + 1)
+        row = Ingredient.get_references().by_id[self.salt.pk]
+        self.assertEqual(row[1], "Морская соль")
+
+    def test_other_worker_sees_new_ingredient(self) -> None:
+        other = ReferenceCache()
+        other.get(Ingredient)
+        Ingredient.get_references()
+        with self.captureOnCommitCallbacks(execute=True):
+            pepper = Ingredient.objects.create(name="Перец")
+
+        self.assertIn(pepper.pk, other.get(Ingredient).by_id)
+        cleaned = self.clean_ingredient(pepper.pk)
+        self.assertEqual(cleaned[0]["ingredient"], pepper.pk)
+
+    def test_deleted_ingredient_is_rejected(self) -> None:
+        pepper = Ingredient.objects.create(name="Перец")
+        pepper_id = pepper.pk
+        self.clean_ingredient(pepper_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            pepper.delete()
+
+        with self.assertRaises(forms.ValidationError) as raised:
+            self.clean_ingredient(pepper_id)
+
+        self.assertEqual(raised.exception.code, "invalid_choice")
+
+
+class IngredientCatalogueTests(RecipeTestCase):
+    def get_catalogue(self, digest: str) -> HttpResponse:
+        return self.client.get(
+            reverse("recipes:ingredient-catalogue", args=[digest]),
+        )
+
+    def test_current_digest_is_immutable(self) -> None:
+        digest, data = ingredient_name_index.get_catalogue()
+        response = self.get_catalogue(digest)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, data)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_rebuild_between_invalidations_is_not_kept(self) -> None:
+        ingredient_name_index.get_catalogue()
+        with self.captureOnCommitCallbacks() as callbacks:
+            pepper = Ingredient.objects.create(name="Перец")
+
+        for callback in callbacks:
+            ingredient_name_index.rebuild()
+            callback()
+
+        found = ingredient_name_index.get_names([pepper.pk])
+        self.assertEqual(found, [(pepper.pk, "Перец")])
+
+    def test_stale_digest_is_served_without_redirect(self) -> None:
+        stale, _ = ingredient_name_index.get_catalogue()
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="Перец")
+
+        digest, data = ingredient_name_index.get_catalogue()
+        self.assertNotEqual(digest, stale)
+        response = self.get_catalogue(stale)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, data)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+
+class RecipeViewTests(RecipeTestCase):
+    def add_comments(self, count: int) -> None:
+        comment_model = Recipe.comments.rel.related_model
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create(
+                username=f"commenter{i}",
+                email=f"commenter{i}@example.com",
+            )
+            comment_model.objects.create(
+                author=author,
+                recipe=self.bread,
+                text=f"Комментарий {i}",
+            )
+
+    def get_recipe(self) -> HttpResponse:
+        return self.client.get(
+            reverse("recipes:recipe", args=[self.bread.pk]),
+        )
+
+    def add_feedback(self) -> None:
+        feedback = {
+            "ratings": {"value": 5},
+            "cooked": {},
+            "comments": {"text": "Вкусно"},
+        }
+        for name, fields in feedback.items():
+            related_model = getattr(Recipe, name).rel.related_model
+            related_model.objects.create(
+                author=self.user,
+                recipe=self.bread,
+                **fields,
+            )
+
+    def test_anonymous_queries_do_not_grow_with_comments(self) -> None:
+        self.add_comments(2)
+        with self.assertNumQueries(4):
+            self.get_recipe()
+
+        self.add_comments(10)
+        with self.assertNumQueries(4):
+            self.get_recipe()
+
+    def test_user_queries_do_not_grow_with_comments(self) -> None:
+        self.add_feedback()
+        self.add_comments(2)
+        self.client.force_login(self.user)
+        with self.assertNumQueries(7):
+            self.get_recipe()
+
+        self.add_comments(10)
+        with self.assertNumQueries(7):
+            response = self.get_recipe()
+
+        self.assertEqual(response.context["user_rating"].value, 5)
+        self.assertIsNotNone(response.context["user_cooked"])
+        self.assertEqual(len(response.context["comments"]), 12)
+
+    def test_comment_edit_updates_timestamp(self) -> None:
+        self.add_feedback()
+        comment_model = Recipe.comments.rel.related_model
+        comment = comment_model.objects.get(author=self.user)
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse("recipes:recipe", args=[self.bread.pk]),
+            {"text": "Очень вкусно"},
+        )
+
+        edited = comment_model.objects.get(pk=comment.pk)
+        self.assertEqual(edited.text, "Очень вкусно")
+        self.assertGreater(edited.updated, comment.updated)
+
+    def get_comments(self, cursor: str) -> HttpResponse:
+        return self.client.get(
+            reverse("recipes:recipe-comments", args=[self.bread.pk]),
+            {"cursor": cursor},
+        )
+
+    def test_comments_fragment_continues_after_cursor(self) -> None:
+        self.add_comments(25)
+        comment_model = Recipe.comments.rel.related_model
+        created = comment_model.objects.first().created
+        comment_model.objects.update(created=created)
+
+        first = self.get_recipe().context["comments"]
+        self.assertEqual(len(first), 20)
+        self.assertTrue(first.has_next())
+
+        response = self.get_comments(first.next_cursor)
+        rest = response.context["comments"]
+        self.assertEqual(len(rest), 5)
+        self.assertFalse(rest.has_next())
+        self.assertNotContains(response, "data-comments-url")
+
+        seen = [comment.pk for comment in [*first, *rest]]
+        expected = comment_model.objects.order_by("pk")
+        self.assertEqual(seen, list(expected.values_list("pk", flat=True)))
+
+    def test_comments_fragment_excludes_own_comment(self) -> None:
+        self.add_comments(21)
+        self.add_feedback()
+        self.client.force_login(self.user)
+        first = self.get_recipe().context["comments"]
+        rest = self.get_comments(first.next_cursor).context["comments"]
+        authors = {comment.author_id for comment in [*first, *rest]}
+        self.assertEqual(len(authors), 21)
+        self.assertNotIn(self.user.pk, authors)
+
+    def test_comments_fragment_needs_published_recipe(self) -> None:
+        draft = self.create_recipe(
+            "Черновик",
+            [self.salt],
+            state=RecipeState.MODERATED,
+        )
+        response = self.client.get(
+            reverse("recipes:recipe-comments", args=[draft.pk]),
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class RecipeFormTests(RecipeTestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        cls.category = Category.objects.create(name="Выпечка")
+        cls.extra = [
+            Ingredient.objects.create(name=f"Специя {i}") for i in range(10)
+        ]
+        cls.other = User.objects.create(
+            username="editor",
+            email="editor@example.com",
+        )
+
+    def get_data(self, rows: list[tuple[str, Ingredient, int]]) -> dict:
+        data = {
+            "name": "Пирог",
+            "level": RecipeLevel.NORMAL,
+            "time": 30,
+            "instruction": "Испечь",
+            "categories": [self.category.pk],
+        }
+        for id_, ingredient, count in rows:
+            data[f"ingredients_{id_}_ingredient"] = str(ingredient.pk)
+            data[f"ingredients_{id_}_count"] = str(count)
+            data[f"ingredients_{id_}_unit"] = IngredientUnit.G
+
+        return data
+
+    def get_form(
+        self,
+        rows: list[tuple[str, Ingredient, int]],
+        instance: Recipe | None = None,
+    ) -> RecipeForm:
+        kwargs = {} if instance is None else {"instance": instance}
+        form = RecipeForm(self.get_data(rows), **kwargs)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def get_rows(self, recipe: Recipe) -> dict[int, tuple[float, str]]:
+        return {
+            row.ingredient_id: (row.count, row.unit)
+            for row in recipe.ingredients.all()
+        }
+
+    def count_save_queries(self, ingredients: list[Ingredient]) -> int:
+        form = self.get_form(
+            [
+                (f"x{i}", ingredient, 1)
+                for i, ingredient in enumerate(ingredients)
+            ],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            form.save(self.user.pk)
+
+        return len(queries)
+
+    def test_create_queries_do_not_grow_with_ingredients(self) -> None:
+        self.assertEqual(
+            self.count_save_queries(self.extra[:2]),
+            self.count_save_queries(self.extra),
+        )
+
+    def test_edit_queries_do_not_grow_with_ingredients(self) -> None:
+        for size in (2, len(self.extra)):
+            with self.subTest(size=size):
+                recipe = self.create_recipe("Пирог", self.extra[:size])
+                rows = [
+                    (str(row.pk), row.ingredient, index)
+                    for index, row in enumerate(recipe.ingredients.all())
+                ]
+                form = self.get_form(rows, instance=recipe)
+                with self.assertNumQueries(9):
+                    form.save()
+
+    def test_delete_queries_do_not_grow_with_ingredients(self) -> None:
+        bump_generation(ingredient_index.version_key)
+        bump_generation(search_cache.generation_key)
+        for size in (2, len(self.extra)):
+            with self.subTest(size=size):
+                recipe = self.create_recipe("Пирог", self.extra[:size])
+                row = recipe.ingredients.first()
+                form = self.get_form(
+                    [(str(row.pk), row.ingredient, 1)],
+                    instance=recipe,
+                )
+                with (
+                    self.assertNumQueries(22),
+                    self.captureOnCommitCallbacks(execute=True),
+                ):
+                    form.save()
+
+                self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_edit_updates_replaces_and_deletes_rows(self) -> None:
+        salt, flour = self.bread.ingredients.order_by("pk")
+        rows = [
+            (str(salt.pk), self.salt, 5),
+            (str(flour.pk), self.sugar, 2),
+            ("x1", self.extra[0], 3),
+        ]
+        self.get_form(rows, instance=self.bread).save()
+
+        self.assertEqual(
+            self.get_rows(self.bread),
+            {
+                self.salt.pk: (5, IngredientUnit.G),
+                self.sugar.pk: (2, IngredientUnit.G),
+                self.extra[0].pk: (3, IngredientUnit.G),
+            },
+        )
+        self.assertFalse(
+            RecipeIngredient.objects.filter(pk=flour.pk).exists(),
+        )
+
+    def test_edit_keeps_author_and_saves_categories(self) -> None:
+        recipe = self.get_form([("x1", self.salt, 1)]).save(self.user.pk)
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.get_form([], instance=recipe).save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.author, self.user)
+        self.assertEqual(list(recipe.categories.all()), [self.category])
+        self.assertEqual(self.get_rows(recipe), {})
+
+
+class RecipeSaveTests(RecipeTestCase):
+    def test_save_keeps_denormalized_rating(self) -> None:
+        recipe = Recipe.objects.get(pk=self.bread.pk)
+        Recipe.objects.update_rating(recipe.pk, 5, 1)
+        recipe.name = "Батон"
+        recipe.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, "Батон")
+        self.assertEqual(recipe.rating_count, 1)
+        self.assertEqual(recipe.rating, 5)
+
+    def test_save_with_deferred_fields_does_not_load_them(self) -> None:
+        recipe = Recipe.objects.only("name", "normalized_name").get(
+            pk=self.bread.pk,
+        )
+        recipe.name = "Батон"
+        with CaptureQueriesContext(connection) as queries:
+            recipe.save()
+
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertNotIn("SELECT", statements)
+
+        recipe = Recipe.objects.get(pk=self.bread.pk)
+        self.assertEqual(recipe.name, "Батон")
+        self.assertEqual(recipe.instruction, "Приготовить")
+
+
+@override_settings(THUMBNAIL_DETERMINISTIC_PATHS=True, THUMBNAIL_WORKERS=0)
+class PathThumbnailCleanupTests(RecipeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        self.field_name = Recipe.main_image.field.name
+
+    def save_image(self, color: str) -> str:
+        output = BytesIO()
+        Image.new("RGB", (600, 300), color).save(output, format="JPEG")
+        return default_storage.save(
+            f"recipes/{color}.jpg",
+            ContentFile(output.getvalue()),
+        )
+
+    def set_image(self, recipe: Recipe, color: str) -> list[str]:
+        recipe.main_image = self.save_image(color)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+
+        return [
+            get_path_thumbnail(recipe, self.field_name, name).name
+            for name in recipe.thumbnails[self.field_name]
+        ]
+
+    def assert_exist(self, names: list[str], exist: bool) -> None:
+        for name in names:
+            self.assertEqual(default_storage.exists(name), exist, name)
+
+    def test_replaced_image_thumbnails_are_deleted(self) -> None:
+        recipe = Recipe.objects.get(pk=self.bread.pk)
+        red = self.set_image(recipe, "red")
+        self.assert_exist(red, True)
+
+        blue = self.set_image(recipe, "blue")
+        self.assert_exist(red, False)
+        self.assert_exist(blue, True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assert_exist(blue, False)
+
+    def test_dedup_media_moves_every_reference(self) -> None:
+        recipe = Recipe.objects.get(pk=self.bread.pk)
+        thumbnails = self.set_image(recipe, "red")
+        name = recipe.main_image.name
+        Recipe.objects.filter(pk=self.cake.pk).update(main_image=name)
+        command = dedup_media.Command(stdout=StringIO(), stderr=StringIO())
+        command.storage = ContentAddressedStorage()
+        command.dry_run = False
+        command.moved = command.merged = command.freed = 0
+        command.seen = set()
+        command.done = set()
+        command.fields = [(Recipe, Recipe.main_image.field)]
+
+        command.dedup_field(Recipe, Recipe.main_image.field, 10)
+
+        self.assertEqual(command.stderr.getvalue(), "")
+        self.assertEqual(command.moved, 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assert_exist(thumbnails, False)
+        images = Recipe.objects.filter(
+            pk__in=[self.bread.pk, self.cake.pk],
+        ).values_list(self.field_name, flat=True)
+        for image in images:
+            self.assertTrue(command.storage.is_content_name(image))
+            self.assertTrue(command.storage.exists(image))
+
+
+__all__ = []
@@ -15,11 +15,26 @@ urlpatterns = [
         views.SearchView.as_view(),
         name="search",
     ),
+    path(
+        "ingredients/autocomplete/",
+        views.IngredientAutocompleteView.as_view(),
+        name="ingredient-autocomplete",
+    ),
+    path(
+        "ingredients/catalogue/<slug:digest>.json",
+        views.IngredientCatalogueView.as_view(),
+        name="ingredient-catalogue",
+    ),
     path(
         "recipe/<int:pk>",
         views.RecipeView.as_view(),
         name="recipe",
     ),
+    path(
+        "recipe/<int:pk>/comments",
+        views.RecipeCommentsView.as_view(),
+        name="recipe-comments",
+    ),
     path(
         "recipe/<int:pk>/edit",
         views.RecipeEditView.as_view(),
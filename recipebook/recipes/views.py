@@ -1,13 +1,22 @@
 from typing import Any
 
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count, Sum
+from django.core.paginator import Page, Paginator
 from django.db.models.query import QuerySet
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.views.generic import DetailView, FormView, ListView, TemplateView
+from django.utils.cache import patch_cache_control
+from django.views.generic import (
+    DetailView,
+    FormView,
+    ListView,
+    TemplateView,
+    View,
+)
 
+from core.pagination import CursorPage, CursorPaginator
+from core.thumbnails import prefetch_thumbnails
 from feedback.forms import (
     CommentForm,
     DeleteCommentForm,
@@ -16,8 +25,12 @@ from feedback.forms import (
 )
 from feedback.forms import CookedForm, DeleteCookedForm
 from feedback.models import Comment, Cooked, Rate
+from recipes.caches import SearchPaginator
 from recipes.forms import RecipeForm
-from recipes.models import Category, Ingredient, Kitchen, Recipe, RecipeLevel
+from recipes.indexes import ingredient_name_index
+from recipes.managers import parse_ids
+from recipes.models import Category, Kitchen, Recipe, RecipeLevel
+from users.models import User
 
 
 class MainView(TemplateView):
@@ -25,8 +38,19 @@ class MainView(TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        last_5_recipes = Recipe.objects.order_by("-created")[:5]
-        most_popular_5 = Recipe.objects.order_by("created")[:5]
+        last_5_recipes = list(
+            Recipe.objects.optimize_for_cards(Recipe.objects.newest())[:5],
+        )
+        most_popular_5 = list(
+            Recipe.objects.optimize_for_cards(Recipe.objects.popular())[:5],
+        )
+        main_image = Recipe.main_image.field.name
+        prefetch_thumbnails(
+            [*last_5_recipes, *most_popular_5],
+            main_image,
+            "500",
+            *Recipe.get_thumbnail_variants(main_image, "500"),
+        )
         context["last_5_recipes"] = last_5_recipes
         context["most_popular_5"] = most_popular_5
         return context
@@ -37,63 +61,207 @@ class SearchView(ListView):
     paginate_by = 16
     context_object_name = "recipes"
 
-    def get_queryset(self) -> QuerySet:
-        queryset = Recipe.objects.search(self.request.GET)
-        return Recipe.objects.optimize_for_search_page(queryset)
+    def get_queryset(self) -> QuerySet | list[int] | CursorPage:
+        if self.page_kwarg in self.request.GET:
+            return Recipe.objects.search(self.request.GET)
+
+        return Recipe.objects.search_after(
+            self.request.GET,
+            self.request.GET.get("cursor"),
+            self.paginate_by,
+        )
+
+    def get_paginator(
+        self,
+        queryset: QuerySet | list[int],
+        per_page: int,
+        **kwargs: Any,
+    ) -> SearchPaginator:
+        return SearchPaginator(
+            queryset,
+            per_page,
+            Recipe.objects.canonicalize(self.request.GET),
+            **kwargs,
+        )
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet | list[int] | CursorPage,
+        page_size: int,
+    ) -> tuple[Paginator | None, Page | CursorPage, list[Recipe], bool]:
+        paginator = None
+        if isinstance(queryset, CursorPage):
+            page = queryset
+            is_paginated = page.has_next() or "cursor" in self.request.GET
+        else:
+            paginator, page, _, is_paginated = super().paginate_queryset(
+                queryset,
+                page_size,
+            )
+
+        page.object_list = Recipe.objects.get_search_page(
+            list(page.object_list),
+        )
+        return paginator, page, page.object_list, is_paginated
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
+        facets = Recipe.objects.facets(self.request.GET)
+        categories = facets[Recipe.categories.field.name]
+        kitchens = facets[Recipe.kitchen.field.name]
+        levels = facets[Recipe.level.field.name]
 
         context.update(
             {
-                "categories": Category.objects.all(),
-                "ingredients": Ingredient.objects.all(),
-                "kitchens": Kitchen.objects.all(),
-                "levels": RecipeLevel.choices,
+                "categories": self.get_facet_options(
+                    [
+                        (id_, name)
+                        for id_, name, _ in Category.get_references().rows
+                    ],
+                    categories,
+                    "sc",
+                ),
+                "kitchens": self.get_facet_options(
+                    [
+                        (id_, name)
+                        for id_, name, _ in Kitchen.get_references().rows
+                    ],
+                    kitchens,
+                    "sk",
+                ),
+                "levels": self.get_facet_options(
+                    RecipeLevel.choices,
+                    levels,
+                    "sl",
+                ),
             },
         )
 
         return context
 
+    def get_facet_options(
+        self,
+        choices: list[tuple[int, str]],
+        counts: dict[int, int],
+        param: str,
+    ) -> list[tuple[int, str, int]]:
+        selected = self.request.GET.get(param, "")
+        return [
+            (value, name, counts.get(value, 0))
+            for value, name in choices
+            if value in counts or str(value) == selected
+        ]
+
+
+class IngredientAutocompleteView(View):
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        ids = parse_ids(request.GET.get("ids", ""))
+        if ids:
+            found = ingredient_name_index.get_names(ids)
+        else:
+            limit = request.GET.get("limit", "")
+            limit = int(limit) if limit.isdigit() else self.default_limit
+            found = ingredient_name_index.search(
+                request.GET.get("q", ""),
+                min(limit, self.max_limit),
+            )
+
+        return JsonResponse(
+            {
+                "results": [{"id": id_, "name": name} for id_, name in found],
+            },
+        )
+
+
+class IngredientCatalogueView(View):
+    max_age = 60 * 60 * 24 * 365
+
+    def get(self, request: HttpRequest, digest: str) -> HttpResponse:
+        current, data = ingredient_name_index.get_catalogue()
+        response = HttpResponse(data, content_type="application/json")
+        if digest != current:
+            patch_cache_control(response, no_cache=True)
+            return response
+
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=self.max_age,
+            immutable=True,
+        )
+        return response
+
+
+class RecipeCommentsMixin:
+    paginate_comments_by = 20
+
+    def get_comments(self) -> QuerySet:
+        return (
+            Comment.objects.filter(**{Comment.recipe.field.name: self.object})
+            .select_related(Comment.author.field.name)
+            .only(
+                Comment.author.field.name + "__" + User.username.field.name,
+                Comment.recipe.field.name,
+                Comment.created.field.name,
+                Comment.updated.field.name,
+                Comment.text.field.name,
+                Comment.text_html.field.name,
+            )
+        )
+
+    def get_comment_page(self, cursor: str | None) -> CursorPage:
+        comments = self.get_comments()
+        if self.request.user.is_authenticated:
+            comments = comments.exclude(
+                **{Comment.author.field.name: self.request.user},
+            )
+
+        paginator = CursorPaginator(
+            comments,
+            [Comment.created.field.name],
+            self.paginate_comments_by,
+        )
+        return paginator.get_object_page(cursor)
+
 
-class RecipeView(DetailView):
+class RecipeView(RecipeCommentsMixin, DetailView):
     template_name = "recipes/recipe.html"
     queryset = Recipe.objects.optimize_for_detail_page(
         Recipe.objects.published(),
     )
     context_object_name = "recipe"
 
-    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
-        context = super().get_context_data(**kwargs)
-        recipe = self.object
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+        if not self.request.user.is_authenticated:
+            return queryset
+
+        return Recipe.objects.with_user_feedback(queryset, self.request.user)
 
-        ratings = Rate.objects.filter(recipe=recipe).aggregate(
-            sum=Sum("value"),
-            count=Count("value"),
+    def get_user_feedback(self) -> tuple[Rate | None, Cooked | None]:
+        return (
+            Rate.from_user_feedback(self.object, self.request.user),
+            Cooked.from_user_feedback(self.object, self.request.user),
         )
-        rating_count = ratings["count"]
-        rating_sum = ratings["sum"] or 0
 
-        user_rating = None
-        user_cooked = None
-        if self.request.user.is_authenticated:
-            user_rating = Rate.objects.filter(
-                author=self.request.user,
-                recipe=recipe,
-            ).first()
-            user_cooked = Cooked.objects.filter(
-                author=self.request.user,
-                recipe=recipe,
-            ).first()
-
-        comments = list(Comment.objects.filter(recipe=recipe).all())
-        user_comment = None
-        for i, comment in enumerate(comments):
-            if comment.author_id == self.request.user.id:
-                user_comment = comment
-                del comments[i]
-                break
+    def get_user_comment(self) -> Comment | None:
+        if not self.request.user.is_authenticated:
+            return None
+
+        return (
+            self.get_comments()
+            .filter(**{Comment.author.field.name: self.request.user})
+            .first()
+        )
 
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        recipe = self.object
+        user_rating, user_cooked = self.get_user_feedback()
+        user_comment = self.get_user_comment()
         context.update(
             {
                 "rating_form": RatingForm(instance=user_rating),
@@ -102,16 +270,12 @@ class RecipeView(DetailView):
                 "delete_comment_form": DeleteCommentForm(),
                 "cooked_form": CookedForm(),
                 "delete_cooked_form": DeleteCookedForm(),
-                "rating": (
-                    round(rating_sum / rating_count, 2)
-                    if rating_count > 0
-                    else 0
-                ),
-                "rating_count": rating_count,
+                "rating": round(recipe.rating, 2),
+                "rating_count": recipe.rating_count,
                 "user_rating": user_rating,
                 "user_comment": user_comment,
                 "user_cooked": user_cooked,
-                "comments": comments,
+                "comments": self.get_comment_page(None),
             },
         )
 
@@ -119,10 +283,9 @@ class RecipeView(DetailView):
 
     def post(self, request: HttpRequest, pk: int) -> HttpResponse:
         self.object = self.get_object()
-        context = self.get_context_data()
-        user_rating = context["user_rating"]
-        user_comment = context["user_comment"]
-        user_cooked = context["user_cooked"]
+        user_rating, user_cooked = self.get_user_feedback()
+        user_comment = self.get_user_comment()
+
         rating_form = RatingForm(request.POST, instance=user_rating)
         comment_form = CommentForm(request.POST, instance=user_comment)
         delete_rating_form = DeleteRatingForm(request.POST)
@@ -172,7 +335,20 @@ class RecipeView(DetailView):
                 user_comment.delete()
                 return redirect(reverse("recipes:recipe", args=[pk]))
 
-        return self.render_to_response(context)
+        return self.render_to_response(self.get_context_data())
+
+
+class RecipeCommentsView(RecipeCommentsMixin, DetailView):
+    template_name = "recipes/includes/comments.html"
+    queryset = Recipe.objects.published().only("pk")
+    context_object_name = "recipe"
+
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context["comments"] = self.get_comment_page(
+            self.request.GET.get("cursor"),
+        )
+        return context
 
 
 class RecipeEditView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
@@ -0,0 +1,196 @@
+const ingredient_catalogues = {};
+const ingredient_search_limit = 10;
+
+function loadIngredientCatalogue(url)
+{
+	if (!(url in ingredient_catalogues))
+		ingredient_catalogues[url] = fetch(url)
+			.then(response => response.json())
+			.then(({ similar, ingredients }) => ({
+				similar,
+				ingredients: ingredients.map(([id, name, key]) => ({ id, name, key })),
+				names: Object.fromEntries(ingredients.map(([id, name]) => [id, name])),
+			}));
+	return ingredient_catalogues[url];
+}
+
+function normalizeIngredientName(catalogue, str)
+{
+	const only_letters = str.normalize("NFKC").toLowerCase().replaceAll(/[^а-яёa-z\d]/g, "");
+	return [...only_letters].map(ch => catalogue.similar[ch] ?? ch).join("");
+}
+
+function searchIngredientCatalogue(catalogue, query)
+{
+	const key = normalizeIngredientName(catalogue, query);
+	const prefix = [];
+	const inner = [];
+	for (const ingredient of catalogue.ingredients)
+	{
+		if (prefix.length >= ingredient_search_limit) break;
+		const index = ingredient.key.indexOf(key);
+		if (index == 0)
+			prefix.push(ingredient);
+		else if (index > 0 && inner.length < ingredient_search_limit)
+			inner.push(ingredient);
+	}
+	return [...prefix, ...inner].slice(0, ingredient_search_limit);
+}
+
+function initIngredientsWidget(list)
+{
+	const name = list.dataset.name;
+	const id = list.id;
+	const template = list.querySelector("template");
+	const btn_add = document.getElementById(`${id}_add`);
+	const catalogue_request = loadIngredientCatalogue(list.dataset.catalogueUrl);
+	const rows = JSON.parse(document.getElementById(list.dataset.rowsId).textContent);
+	let lastId = 0;
+
+	rows.forEach(addItem);
+	btn_add.addEventListener("click", () => addItem({ id: `x${lastId++}` }));
+
+	function addItem(item)
+	{
+		const el = template.content.cloneNode(true);
+		const countEl = el.querySelector("#ingredients-widget-count");
+		const unitEl = el.querySelector("#ingredients-widget-unit");
+		const ingredientHiddenEl = el.querySelector("#ingredients-widget-ingredient-hidden");
+		const ingredientEl = el.querySelector("#ingredients-widget-ingredient");
+		const btn_delete = el.querySelector("#ingredients-widget-delete");
+		const itemEl = el.querySelector("#ingredients-widget-item");
+
+		countEl.value = item.count || 0;
+		unitEl.value = item.unit || list.dataset.defaultUnit;
+		ingredientHiddenEl.value = item.ingredient;
+		countEl.name = `${name}_${item.id}_count`;
+		unitEl.name = `${name}_${item.id}_unit`;
+		ingredientHiddenEl.name = `${name}_${item.id}_ingredient`;
+		itemEl.id = id + "_" + item.id;
+		btn_delete.addEventListener("click", () =>
+		{
+			const addedEl = document.getElementById(itemEl.id)
+			list.removeChild(addedEl);
+		});
+
+		const _ingredient_container = el.querySelector("#ingredients-widget-ingredient-container");
+		const _ingredient_input = el.querySelector("#ingredients-widget-ingredient");
+		const _ingredient_list = el.querySelector("#ingredients-widget-ingredient-list");
+		_ingredient_container.id = id + "_" + item.id + "_ingredients-widget-ingredient-container";
+		_ingredient_input.id = id + "_" + item.id + "_ingredients-widget-ingredient";
+		_ingredient_list.id = id + "_" + item.id + "_ingredients-widget-ingredient-list";
+		list.appendChild(el);
+
+		const ingredient_input = document.getElementById(_ingredient_input.id);
+		const ingredient_list = document.getElementById(_ingredient_list.id);
+		const not_found_el = ingredient_list.children[0];
+		let ingredients = [];
+		let lastIngredient = null;
+		let search_selected = 0;
+
+		catalogue_request.then(catalogue =>
+		{
+			const ingredient_id = Number(item.ingredient);
+			if (ingredient_id in catalogue.names)
+			{
+				lastIngredient = { id: ingredient_id, name: catalogue.names[ingredient_id] };
+				ingredientEl.value = lastIngredient.name;
+			}
+		});
+
+		ingredient_input.addEventListener("focus", () => {
+			ingredient_list.classList.add("ingredients-widget-search_visible");
+			search();
+		})
+		ingredient_input.addEventListener("blur", () => {
+			ingredient_list.classList.remove("ingredients-widget-search_visible"),
+			setValue();
+		})
+		ingredient_input.addEventListener("keyup", e =>
+		{
+			if (e.key == "Escape")
+			{
+				ingredient_list.classList.remove("ingredients-widget-search_visible");
+				resetValue();
+			}
+		})
+		ingredient_input.addEventListener("keydown", e =>
+		{
+			if (e.key == "Enter")
+			{
+				e.preventDefault();
+				e.stopPropagation();
+				selectIngredient(ingredients[search_selected]);
+			}
+			if (e.key == "ArrowUp")
+			{
+				e.preventDefault();
+				search_selected = Math.max(0, search_selected - 1);
+				select();
+			}
+			if (e.key == "ArrowDown")
+			{
+				e.preventDefault();
+				search_selected = Math.max(0, Math.min(ingredients.length - 1, search_selected + 1));
+				select();
+			}
+		})
+		ingredient_input.addEventListener("input", () => {
+			ingredient_list.classList.add("ingredients-widget-search_visible");
+			search();
+		});
+
+		async function search()
+		{
+			const catalogue = await catalogue_request;
+			const results = searchIngredientCatalogue(catalogue, ingredient_input.value);
+
+			ingredients.forEach(v => v.el.remove());
+			ingredients = results.map(ingredient =>
+			{
+				const el = document.createElement("div");
+				el.classList.add("ingredients-widget-search__item");
+				el.innerText = ingredient.name;
+				el.addEventListener("mousedown", () => selectIngredient(ingredient));
+				ingredient_list.insertBefore(el, not_found_el);
+				return { ...ingredient, el };
+			});
+			not_found_el.style.display = ingredients.length > 0 ? "none" : "";
+			search_selected = 0;
+			select();
+		}
+		function select()
+		{
+			ingredients.forEach((v, i) => {
+				v.el.classList.toggle("ingredients-widget-search__item_selected", i == search_selected);
+				if (i == search_selected)
+					v.el.scrollIntoView({ block: "nearest" });
+			});
+		}
+		function setValue()
+		{
+			const search = normalize(ingredient_input.value);
+			const found = ingredients.find(v => normalize(v.name) == search);
+			lastIngredient = found || lastIngredient;
+			resetValue();
+		}
+		function resetValue()
+		{
+			ingredient_input.value = lastIngredient?.name || "";
+			ingredientHiddenEl.value = lastIngredient?.id || "-1";
+		}
+		function normalize(str)
+		{
+			return str.trim().toLowerCase().replaceAll(/\s+/g, "");
+		}
+		function selectIngredient(ingredient)
+		{
+			lastIngredient = ingredient || lastIngredient;
+			ingredient_list.classList.remove("ingredients-widget-search_visible");
+			resetValue();
+		}
+	}
+}
+
+document.addEventListener("DOMContentLoaded", () =>
+	document.querySelectorAll("[data-ingredients-widget]").forEach(initIngredientsWidget));
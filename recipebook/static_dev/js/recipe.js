@@ -0,0 +1,78 @@
+const comments = document.getElementById("comments");
+
+comments.addEventListener("click", async e =>
+{
+	const btn = e.target.closest("[data-comments-url]");
+	if (!btn) return;
+
+	btn.disabled = true;
+	const response = await fetch(btn.dataset.commentsUrl);
+	if (!response.ok)
+	{
+		btn.disabled = false;
+		return;
+	}
+	btn.insertAdjacentHTML("afterend", await response.text());
+	btn.remove();
+})
+
+const recipe_rating = document.getElementById("recipe-rating");
+const user_rating_value = document.getElementById("user-rating-value");
+
+function setVisible(id, visible)
+{
+	document.getElementById(id).hidden = !visible;
+}
+
+function clearCommentForm()
+{
+	const container = document.getElementById("comment-form");
+	for (const textarea of container.querySelectorAll("textarea"))
+		textarea.value = "";
+	for (const editor of container.querySelectorAll(".CodeMirror"))
+		editor.CodeMirror?.setValue("");
+}
+
+function applyFeedback(data)
+{
+	if ("rating_display" in data)
+	{
+		recipe_rating.textContent = data.rating_display;
+		user_rating_value.textContent = data.user_rating ?? "";
+		setVisible("user-rating", data.user_rating !== null);
+		setVisible("delete-rating", data.user_rating !== null);
+	}
+	if ("cooked" in data)
+	{
+		setVisible("add-cooked", !data.cooked);
+		setVisible("delete-cooked", data.cooked);
+	}
+	if ("has_comment" in data)
+	{
+		setVisible("new-comment", !data.has_comment);
+		setVisible("delete-comment", data.has_comment);
+		setVisible("user-comment", data.has_comment);
+		document.getElementById("user-comment").innerHTML = data.text_html ?? "";
+		if (!data.has_comment)
+			clearCommentForm();
+	}
+}
+
+document.addEventListener("submit", async e =>
+{
+	const container = e.target.closest("[data-feedback-url]");
+	if (!container) return;
+
+	e.preventDefault();
+	const form = e.target;
+	const response = await fetch(container.dataset.feedbackUrl, {
+		method: "POST",
+		body: new FormData(form),
+	});
+	if (!response.ok)
+	{
+		form.submit();
+		return;
+	}
+	applyFeedback(await response.json());
+})
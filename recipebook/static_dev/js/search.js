@@ -7,6 +7,7 @@ const btn_sort_name = document.getElementById("sort-name");
 const btn_sort_new = document.getElementById("sort-new");
 const btn_sort_easy = document.getElementById("sort-easy");
 const btn_sort_fast = document.getElementById("sort-fast");
+const btn_sort_rating = document.getElementById("sort-rating");
 
 const btn = document.getElementById("search-btn");
 const clear_btn = document.getElementById("search-clear-btn");
@@ -14,6 +15,7 @@ const clear_btn = document.getElementById("search-clear-btn");
 const ingredient_container = document.getElementById("search-ingredient-container");
 const ingredient_include = document.getElementById("search-ingredient-include");
 const ingredient_exclude = document.getElementById("search-ingredient-exclude");
+const ingredient_have = document.getElementById("search-ingredient-have");
 const ingredient_input = document.getElementById("search-ingredient-input");
 const ingredient_list = document.getElementById("search-ingredient-list");
 
@@ -44,21 +46,7 @@ window.addEventListener("keyup", e =>
 ingredient_input.addEventListener("input", () =>
 {
 	ingredient_list.classList.add("search_visible");
-	const search = ingredient_input.value.trim().toLowerCase().replaceAll(/\s+/g, " ");
-	let found = false;
-	for (let i = 0; i < ingredient_list.children.length - 1; i++)
-	{
-		const el = ingredient_list.children[i];
-		if (el.children[0].innerText.toLowerCase().includes(search))
-		{
-			el.style.display = "";
-			found = true;
-		}
-		else
-			el.style.display = "none";
-	}
-	const not_found_el = ingredient_list.children[ingredient_list.children.length - 1];
-	not_found_el.style.display = found ? "none" : "";
+	searchIngredients();
 })
 
 const url = new URL(window.location);
@@ -69,27 +57,59 @@ inp_level.value = url.searchParams.get("sl") || "";
 
 const ingredients_include = url.searchParams.get("si")?.split("-").filter(v => v && !isNaN(+v)) || [];
 const ingredients_exclude = url.searchParams.get("sie")?.split("-").filter(v => v && !isNaN(+v)) || [];
+const ingredients_have = url.searchParams.get("sh")?.split("-").filter(v => v && !isNaN(+v)) || [];
+
+const autocomplete_url = new URL(ingredient_list.getAttribute("data-url"), window.location);
+const ingredient_template = document.getElementById("search-ingredient-template");
+const not_found_el = ingredient_list.children[ingredient_list.children.length - 1];
+let search_request = 0;
 
+async function fetchIngredients(params)
+{
+	const url = new URL(autocomplete_url);
+	for (const key in params)
+		url.searchParams.set(key, params[key]);
+	const response = await fetch(url);
+	const { results } = await response.json();
+	return results.map(v => ({ id: `${v.id}`, name: v.name }));
+}
 
-for (let i = 0; i < ingredient_list.children.length - 1; i++)
+async function loadSelectedIngredients()
 {
-	const el = ingredient_list.children[i];
-	const id = el.getAttribute("data-id");
-	const name = el.children[0].innerText
+	const ids = [...ingredients_include, ...ingredients_exclude, ...ingredients_have];
+	if (ids.length == 0) return;
+	const found = await fetchIngredients({ ids: ids.join("-") });
+	const byId = Object.fromEntries(found.map(v => [v.id, v]));
+	const resolve = list => list.splice(0, list.length, ...list.map(id => byId[id]).filter(v => v));
+	resolve(ingredients_include);
+	resolve(ingredients_exclude);
+	resolve(ingredients_have);
+	displayAllIngredients();
+}
+
+async function searchIngredients()
+{
+	const request = ++search_request;
+	const found = await fetchIngredients({ q: ingredient_input.value });
+	if (request != search_request) return;
+
+	ingredient_list.querySelectorAll(".search__item").forEach(el => el.remove());
+	for (const { id, name } of found)
+		ingredient_list.insertBefore(createIngredientItem(id, name), not_found_el);
+	not_found_el.style.display = found.length > 0 ? "none" : "";
+}
+
+function createIngredientItem(id, name)
+{
+	const el = ingredient_template.content.firstElementChild.cloneNode(true);
+	el.setAttribute("data-id", id);
+	el.children[0].innerText = name;
 	const cbx_include = el.querySelector("#search-ingredient-include-chb")
 	const cbx_exclude = el.querySelector("#search-ingredient-exclude-chb")
-	const include_i = ingredients_include.indexOf(id);
-	const exclude_i = ingredients_exclude.indexOf(id);
-	if (include_i >= 0)
-	{
-		ingredients_include[include_i] = { id, name };
-		cbx_include.checked = true;
-	}
-	if (exclude_i >= 0)
-	{
-		ingredients_exclude[exclude_i] = { id, name };
-		cbx_exclude.checked = true;
-	}
+	const cbx_have = el.querySelector("#search-ingredient-have-chb")
+	cbx_include.checked = ingredients_include.some(v => v.id == id);
+	cbx_exclude.checked = ingredients_exclude.some(v => v.id == id);
+	cbx_have.checked = ingredients_have.some(v => v.id == id);
 	cbx_include.addEventListener("change", () =>
 	{
 		const i = ingredients_include.findIndex(v => v.id == id);
@@ -117,6 +137,10 @@ for (let i = 0; i < ingredient_list.children.length - 1; i++)
 			cbx_include.checked = false;
 			const i2 = ingredients_include.findIndex(v => v.id == id);
 			if (i2 >= 0) ingredients_include.splice(i2, 1);
+
+			cbx_have.checked = false;
+			const i3 = ingredients_have.findIndex(v => v.id == id);
+			if (i3 >= 0) ingredients_have.splice(i3, 1);
 		}
 		else
 		{
@@ -124,6 +148,24 @@ for (let i = 0; i < ingredient_list.children.length - 1; i++)
 		}
 		displayAllIngredients();
 	});
+	cbx_have.addEventListener("change", () =>
+	{
+		const i = ingredients_have.findIndex(v => v.id == id);
+		if (cbx_have.checked)
+		{
+			if (i < 0) ingredients_have.push({ id, name });
+
+			cbx_exclude.checked = false;
+			const i2 = ingredients_exclude.findIndex(v => v.id == id);
+			if (i2 >= 0) ingredients_exclude.splice(i2, 1);
+		}
+		else
+		{
+			ingredients_have.splice(i, 1);
+		}
+		displayAllIngredients();
+	});
+	return el;
 }
 
 function displayIngredients(container, ingredients)
@@ -140,14 +182,25 @@ function displayAllIngredients()
 {
 	displayIngredients(ingredient_include, ingredients_include);
 	displayIngredients(ingredient_exclude, ingredients_exclude);
+	displayIngredients(ingredient_have, ingredients_have);
 }
-displayAllIngredients()
+loadSelectedIngredients();
+searchIngredients();
 
 pagination.querySelectorAll("button")
 	.forEach(el => el.addEventListener("click", () =>
 	{
 		const url = new URL(window.location);
-		url.searchParams.set("page", el.getAttribute("data-page"));
+		if (el.hasAttribute("data-cursor"))
+		{
+			url.searchParams.delete("page");
+			url.searchParams.set("cursor", el.getAttribute("data-cursor"));
+		}
+		else
+		{
+			url.searchParams.delete("cursor");
+			url.searchParams.set("page", el.getAttribute("data-page"));
+		}
 		window.location = url;
 	})
 );
@@ -168,20 +221,23 @@ inp_name.addEventListener("keypress", e =>
 function search()
 {
 	const url = new URL(window.location);
-	url.searchParams.set("page", 1);
+	url.searchParams.delete("page");
+	url.searchParams.delete("cursor");
 	url.searchParams.set("sn", inp_name.value);
 	url.searchParams.set("sc", inp_category.value);
 	url.searchParams.set("sk", inp_kitchen.value);
 	url.searchParams.set("sl", inp_level.value);
-	url.searchParams.set("si", ingredients_include.map(v => v.id).join("-"));
-	url.searchParams.set("sie", ingredients_exclude.map(v => v.id).join("-"));
+	url.searchParams.set("si", ingredients_include.map(v => v.id || v).join("-"));
+	url.searchParams.set("sie", ingredients_exclude.map(v => v.id || v).join("-"));
+	url.searchParams.set("sh", ingredients_have.map(v => v.id || v).join("-"));
 	window.location = url;
 }
 
 function sort(type)
 {
 	const url = new URL(window.location);
-	url.searchParams.set("page", 1);
+	url.searchParams.delete("page");
+	url.searchParams.delete("cursor");
 	url.searchParams.set("order", type);
 	window.location = url;
 }
@@ -190,3 +246,4 @@ btn_sort_name.addEventListener("click", () => sort("name"));
 btn_sort_new.addEventListener("click", () => sort("new"));
 btn_sort_easy.addEventListener("click", () => sort("easy"));
 btn_sort_fast.addEventListener("click", () => sort("fast"));
+btn_sort_rating.addEventListener("click", () => sort("rating"));
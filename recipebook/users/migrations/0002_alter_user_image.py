@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-18 10:59
+
+import core.storage
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=core.storage.get_media_storage,
+                upload_to=core.utils.RandomFileName("users/image/"),
+                verbose_name="users__model__user__image",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:01
+
+import core.images
+import core.storage
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_user_image"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=core.storage.get_media_storage,
+                upload_to=core.utils.RandomFileName("users/image/"),
+                validators=[core.images.validate_image_upload],
+                verbose_name="users__model__user__image",
+            ),
+        ),
+    ]
@@ -3,8 +3,10 @@ from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
-from sorl.thumbnail import get_thumbnail
 
+from core.images import validate_image_upload
+from core.models import ThumbnailsMixin
+from core.storage import get_media_storage
 from core.utils import RandomFileName, Thumbnail
 
 
@@ -49,8 +51,14 @@ class UserManager(BaseUserManager):
             return None
 
 
-class User(AbstractUser):
+class User(ThumbnailsMixin, AbstractUser):
     objects: UserManager["User"] = UserManager()
+    thumbnails = {
+        "image": {
+            "32x32": {"crop": "center", "quality": 85, "format": "PNG"},
+            "128x128": {"crop": "center", "quality": 85, "format": "PNG"},
+        },
+    }
 
     email = models.EmailField(
         verbose_name=_("users__model__user__email"),
@@ -59,6 +67,8 @@ class User(AbstractUser):
     image = models.ImageField(
         verbose_name=_("users__model__user__image"),
         upload_to=RandomFileName("users/image/"),
+        storage=get_media_storage,
+        validators=[validate_image_upload],
         null=True,
         blank=True,
     )
@@ -83,28 +93,10 @@ class User(AbstractUser):
         )
 
     def get_image_32x32(self) -> Thumbnail | None:
-        if not self.image:
-            return None
-
-        return get_thumbnail(
-            self.image,
-            "32x32",
-            crop="center",
-            quality=85,
-            format="PNG",
-        )
+        return self.get_thumbnail(self.__class__.image.field.name, "32x32")
 
     def get_image_128x128(self) -> Thumbnail | None:
-        if not self.image:
-            return None
-
-        return get_thumbnail(
-            self.image,
-            "128x128",
-            crop="center",
-            quality=85,
-            format="PNG",
-        )
+        return self.get_thumbnail(self.__class__.image.field.name, "128x128")
 
     def image_tmb(self) -> str:
         if self.image: